@@ -0,0 +1,221 @@
+"""Agentes de IA (Analisador, Validador e Relato) e registo partilhado dos modelos Gemini."""
+import io
+import json
+import threading
+
+import google.generativeai as genai
+
+from backends import ModelBackend
+from metrics import increment, span
+from scheduler import SingleFlight, get_scheduler
+
+MODEL_NAME = "gemini-1.5-flash-latest"
+SAFETY_SETTINGS = {'HARM_CATEGORY_HARASSMENT': 'BLOCK_NONE', 'HARM_CATEGORY_HATE_SPEECH': 'BLOCK_NONE', 'HARM_CATEGORY_SEXUALLY_EXPLICIT': 'BLOCK_ONLY_HIGH', 'HARM_CATEGORY_DANGEROUS_CONTENT': 'BLOCK_NONE'}
+
+VALIDATOR_BLOCKED = "A resposta do Validador foi bloqueada."
+VALIDATOR_ERROR = "Erro ao gerar a resposta final."
+
+
+class ModelRegistry(ModelBackend):
+    """Modelos configurados uma única vez por processo e partilhados por todas as sessões.
+
+    O cliente do SDK (e o seu canal gRPC persistente) é criado no primeiro uso e reaproveitado
+    pelos pedidos seguintes, evitando o custo de configuração e de handshake por pedido.
+    """
+
+    def __init__(self, model_name=MODEL_NAME, safety_settings=SAFETY_SETTINGS):
+        self.model_name = model_name
+        self.safety_settings = safety_settings
+        self._models = {}
+        self._lock = threading.Lock()
+
+    def _build(self, kind):
+        if kind == "json":
+            return genai.GenerativeModel(
+                self.model_name, safety_settings=self.safety_settings,
+                generation_config=genai.types.GenerationConfig(response_mime_type="application/json"),
+            )
+        if kind == "texto":
+            return genai.GenerativeModel(self.model_name, safety_settings=self.safety_settings)
+        if kind == "relato":
+            return genai.GenerativeModel(self.model_name)
+        raise ValueError(f"Tipo de modelo desconhecido: {kind}")
+
+    def get(self, kind):
+        model = self._models.get(kind)
+        if model is None:
+            with self._lock:
+                # Outra thread pode tê-lo criado enquanto esta esperava pelo lock
+                model = self._models.get(kind)
+                if model is None:
+                    model = self._models[kind] = self._build(kind)
+        return model
+
+    def upload_file(self, data, mime_type):
+        return genai.upload_file(path=io.BytesIO(data), mime_type=mime_type)
+
+    def warm_up(self):
+        # Pedido gratuito (contagem de tokens) que abre a ligação TLS antes do primeiro utilizador
+        self.get("texto").count_tokens("ok")
+
+
+_registry = ModelRegistry()
+
+
+def configure(api_key, model_name=MODEL_NAME, transport=None):
+    global _registry
+    genai.configure(api_key=api_key, transport=transport)
+    _registry = ModelRegistry(model_name)
+    return _registry
+
+
+def get_registry():
+    return _registry
+
+
+def use_registry(registry):
+    # Troca o backend (ex.: `backends.FakeBackend` para testes de carga offline)
+    global _registry
+    _registry = registry
+    return registry
+
+
+def upload_media(data, mime_type):
+    # O upload também conta na cota do serviço: passa pela admissão e pelas repetições das outras chamadas
+    return get_scheduler().call("upload", get_registry().upload_file, data, mime_type)
+
+
+def record_response(agent, response):
+    # Tokens de entrada/saída (e os servidos pelo cache de contexto, quando houver) e taxa de bloqueios
+    usage = getattr(response, "usage_metadata", None)
+    if usage:
+        increment("tokens", usage.prompt_token_count or 0, agente=agent, tipo="entrada")
+        increment("tokens", usage.candidates_token_count or 0, agente=agent, tipo="saida")
+        increment("tokens", getattr(usage, "cached_content_token_count", 0) or 0, agente=agent, tipo="cache")
+    increment("respostas_modelo", agente=agent, resultado="ok" if response.parts else "bloqueada")
+
+
+def call_analyzer_agent(prompt_parts: list) -> dict:
+    model = get_registry().get("json")
+    full_prompt = ["""
+        Você é um especialista em cibersegurança (Agente Analisador). Analise o seguinte conteúdo fornecido por um usuário (pode ser texto, imagem, áudio ou uma combinação).
+        Sua tarefa é retornar APENAS um objeto JSON. A estrutura deve ser:
+        {
+          "analise": "Uma análise técnica detalhada sobre os possíveis riscos, identificando padrões de phishing, malware, engenharia social, etc. Se houver áudio, baseie sua análise no conteúdo do áudio.",
+          "risco": "Baixo", "Médio" ou "Alto",
+          "fontes": ["url_da_fonte_1", "url_da_fonte_2"]
+        }
+        Baseie sua análise em pesquisas na internet para garantir que a informação seja atual. Se não encontrar fontes, retorne uma lista vazia.
+        """] + prompt_parts
+    try:
+        with span("analisador"):
+            response = get_scheduler().call("analisador", model.generate_content, full_prompt)
+        record_response("analisador", response)
+        if not response.parts: return {"error": "A resposta foi bloqueada."}
+        return json.loads(response.text)
+    except Exception as e:
+        increment("respostas_modelo", agente="analisador", resultado="erro")
+        return {"error": "Erro ao contactar a IA.", "details": str(e)}
+
+
+def validator_prompt(analysis: dict) -> str:
+    fontes_prompt_section = '### Fontes Consultadas' if analysis.get("fontes", []) else ""
+    return f"""Você é um especialista em comunicação de cibersegurança. Um analista júnior forneceu o seguinte JSON:\n---\n{json.dumps(analysis, indent=2, ensure_ascii=False)}\n---\nSua tarefa é criar uma resposta final para um usuário leigo. A resposta deve ser clara, direta e útil. NÃO use títulos como 'Veredito Final'. Comece diretamente com a análise. Formate sua resposta usando Markdown. A resposta DEVE conter as seguintes seções, usando exatamente estes títulos com '###':\n### Análise Detalhada\n### Recomendações de Segurança\n{fontes_prompt_section}"""
+
+
+# Sessões com a mesma análise em curso (ex.: golpe viral) partilham uma única resposta do Validador
+_validator_flights = SingleFlight()
+
+
+def _final_text(chunks):
+    # Resposta completa de um streaming, para quem esperava por ela; falhas chegam só como o aviso final
+    if chunks and chunks[-1] in (VALIDATOR_BLOCKED, VALIDATOR_ERROR):
+        return chunks[-1]
+    return "".join(chunks)
+
+
+def call_validator_agent(analysis: dict) -> str:
+    prompt = validator_prompt(analysis)
+    return _validator_flights.do(prompt, _validate, prompt)
+
+
+def stream_validator_agent(analysis: dict):
+    # Gera o texto aos pedaços; em caso de falha, o último pedaço é VALIDATOR_BLOCKED ou VALIDATOR_ERROR
+    prompt = validator_prompt(analysis)
+    return _validator_flights.stream(prompt, _stream_validate, _final_text, prompt)
+
+
+def _validate(prompt):
+    model = get_registry().get("texto")
+    try:
+        with span("validador"):
+            response = get_scheduler().call("validador", model.generate_content, prompt)
+        record_response("validador", response)
+        if not response.parts: return VALIDATOR_BLOCKED
+        return response.text
+    except Exception:
+        increment("respostas_modelo", agente="validador", resultado="erro")
+        return VALIDATOR_ERROR
+
+
+def _stream_validate(prompt):
+    model = get_registry().get("texto")
+    try:
+        last = None
+        with span("validador"):
+            for last in get_scheduler().stream("validador", model.generate_content, prompt, stream=True):
+                if not last.parts:
+                    record_response("validador", last)
+                    yield VALIDATOR_BLOCKED
+                    return
+                yield last.text
+    except Exception:
+        increment("respostas_modelo", agente="validador", resultado="erro")
+        yield VALIDATOR_ERROR
+        return
+    if last is None:
+        # Stream sem nenhum pedaço: não há texto para mostrar, tal como numa resposta bloqueada
+        increment("respostas_modelo", agente="validador", resultado="vazia")
+        yield VALIDATOR_BLOCKED
+        return
+    record_response("validador", last)  # o último pedaço traz o total de tokens
+
+
+def call_combined_agent(prompt_parts: list) -> dict:
+    # Modo "combinado": veredicto e resposta final num único pedido, poupando uma ida e volta à rede
+    model = get_registry().get("json")
+    full_prompt = ["""
+        Você é um especialista em cibersegurança e em comunicação com o público. Analise o seguinte conteúdo fornecido por um usuário (pode ser texto, imagem, áudio ou uma combinação).
+        Sua tarefa é retornar APENAS um objeto JSON. A estrutura deve ser:
+        {
+          "analise": "Uma análise técnica detalhada sobre os possíveis riscos, identificando padrões de phishing, malware, engenharia social, etc. Se houver áudio, baseie sua análise no conteúdo do áudio.",
+          "risco": "Baixo", "Médio" ou "Alto",
+          "fontes": ["url_da_fonte_1", "url_da_fonte_2"],
+          "resposta": "A resposta final para um usuário leigo, clara, direta e útil, formatada em Markdown. NÃO use títulos como 'Veredito Final'. Comece diretamente com a análise. Use exatamente os títulos '### Análise Detalhada' e '### Recomendações de Segurança' e, se houver fontes, '### Fontes Consultadas'."
+        }
+        Baseie sua análise em pesquisas na internet para garantir que a informação seja atual. Se não encontrar fontes, retorne uma lista vazia.
+        """] + prompt_parts
+    try:
+        with span("combinado"):
+            response = get_scheduler().call("combinado", model.generate_content, full_prompt)
+        record_response("combinado", response)
+        if not response.parts: return {"error": "A resposta foi bloqueada."}
+        data = json.loads(response.text)
+        if not data.get("resposta"): return {"error": "Resposta incompleta da IA."}
+        return data
+    except Exception as e:
+        increment("respostas_modelo", agente="combinado", resultado="erro")
+        return {"error": "Erro ao contactar a IA.", "details": str(e)}
+
+
+def gerar_relato_golpe(tipo, prejuizo, descricao):
+    model = get_registry().get("relato")
+    prompt = f"""Aja como um assistente para uma vítima de golpe no Brasil. Com base nas informações a seguir, escreva um texto formal e claro, em português do Brasil, para ser usado em um boletim de ocorrência ou em um contato com o banco. Organize o texto com parágrafos claros.\n\n- **Tipo de Golpe:** {tipo}\n- **Prejuízo:** {prejuizo}\n- **Descrição dos Fatos:** {descricao}\n\nO texto deve ser objetivo, relatando os fatos de forma cronológica e precisa, para que a autoridade ou o gerente do banco possa entender claramente o que aconteceu. Comece com "Assunto: Relato de Ocorrência de Estelionato Virtual" e termine com um espaço para o nome e a data."""
+    try:
+        with span("relato"):
+            response = get_scheduler().call("relato", model.generate_content, prompt)
+        record_response("relato", response)
+        return response.text
+    except Exception as e:
+        increment("respostas_modelo", agente="relato", resultado="erro")
+        return f"Erro ao gerar o relato: {e}"
@@ -0,0 +1,121 @@
+"""Interface dos backends de modelo e um backend local determinístico, para executar o fluxo offline."""
+import hashlib
+import json
+import random
+import time
+from abc import ABC, abstractmethod
+
+
+class ModelBackend(ABC):
+    """Contrato usado pelos agentes; a implementação Gemini é `agents.ModelRegistry`.
+
+    `get(kind)` devolve um objeto com `generate_content(contents, stream=False)` no formato do SDK
+    (respostas com `.parts` e `.text`). `kind` é "json" (Analisador), "texto" (Validador) ou "relato".
+    """
+
+    model_name = None
+
+    @abstractmethod
+    def get(self, kind):
+        ...
+
+    @abstractmethod
+    def upload_file(self, data, mime_type):
+        ...
+
+    def warm_up(self):
+        pass
+
+
+class FakeQuotaError(Exception):
+    """Imita `google.api_core.exceptions.ResourceExhausted` (HTTP 429)."""
+
+    code = 429
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+        self.parts = [text] if text else []
+
+
+def _digest(contents):
+    digest = hashlib.blake2b(digest_size=8)
+    for part in contents if isinstance(contents, list) else [contents]:
+        if isinstance(part, dict):
+            digest.update(part.get("data", b""))
+        else:
+            digest.update(str(part).encode("utf-8"))
+    return int.from_bytes(digest.digest(), "big")
+
+
+class FakeModel:
+    """Imita `genai.GenerativeModel`: a mesma entrada produz sempre a mesma resposta e a mesma latência."""
+
+    RISKS = ("Baixo", "Médio", "Alto")
+
+    def __init__(self, kind, latency=0.0, jitter=0.0, error_rate=0.0):
+        self.kind = kind
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+
+    def _reply(self, contents, seed):
+        if self.kind == "relato":
+            return "Assunto: Relato de Ocorrência de Estelionato Virtual\n\nRelato gerado localmente.\n\nNome:\nData:"
+        response = (
+            "### Análise Detalhada\nAnálise gerada localmente.\n"
+            "### Recomendações de Segurança\n1. **Não** clique em links desconhecidos.\n2. Confirme a identidade do remetente.\n"
+            "3. Ative a confirmação em duas etapas."
+        )
+        if self.kind == "texto":
+            return response
+        # O resumo da entrada entra na análise: entradas diferentes geram pedidos diferentes ao Validador,
+        # que de outro modo seriam agrupados pelo SingleFlight e inflacionariam os benchmarks
+        analysis = {"analise": f"Análise gerada localmente (entrada {seed:016x}).", "risco": self.RISKS[seed % 3], "fontes": []}
+        prompt = contents[0] if isinstance(contents, list) else contents
+        if '"resposta"' in prompt:  # prompt do modo combinado
+            analysis["resposta"] = response
+        return json.dumps(analysis, ensure_ascii=False)
+
+    def generate_content(self, contents, stream=False):
+        if self.error_rate and random.random() < self.error_rate:
+            raise FakeQuotaError("429 Resource has been exhausted (simulado)")
+        seed = _digest(contents)
+        text = self._reply(contents, seed)
+        delay = self.latency + random.Random(seed).uniform(0, self.jitter)
+        if not stream:
+            time.sleep(delay)
+            return FakeResponse(text)
+        chunks = [text[i:i + 40] for i in range(0, len(text), 40)]
+        return self._stream(chunks, delay / len(chunks))
+
+    @staticmethod
+    def _stream(chunks, delay):
+        for chunk in chunks:
+            time.sleep(delay)
+            yield FakeResponse(chunk)
+
+    def count_tokens(self, contents):
+        return None
+
+
+class FakeBackend(ModelBackend):
+    """Backend sem rede com latência injetada (`latency` + até `jitter` segundos por chamada).
+
+    `error_rate` é a fração de chamadas que falham com um erro de cota, para exercitar as repetições.
+    """
+
+    model_name = "fake"
+
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+
+    def get(self, kind):
+        return FakeModel(kind, self.latency, self.jitter, self.error_rate)
+
+    def upload_file(self, data, mime_type):
+        time.sleep(self.latency)
+        return f"[{mime_type}: {len(data)} bytes]"
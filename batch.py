@@ -0,0 +1,211 @@
+"""Verificação em lote, sem interface, de mensagens exportadas (JSONL ou CSV).
+
+Cada registo pode ter os campos `id`, `texto`, `imagem` e `audio` (caminhos relativos ao ficheiro de entrada).
+Os resultados são acrescentados ao ficheiro de saída à medida que ficam prontos; ao reexecutar o mesmo
+comando, os ids já concluídos na saída são ignorados, retomando o trabalho onde parou; os registos que
+terminaram com `erro` são refeitos e o novo resultado é acrescentado (vale a última linha de cada id).
+
+Uso: python batch.py entrada.jsonl -o resultados.jsonl [--concorrencia 4] [--por-segundo 2] [--backend fake]
+"""
+import argparse
+import csv
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import agents
+import metrics
+import scheduler
+from agents import VALIDATOR_BLOCKED, VALIDATOR_ERROR
+from heuristics import RuleEngine
+from ioc_index import IndicatorIndex
+from similarity_index import SimilarityIndex
+from verdict_cache import VerdictCache
+from verifier import MODES, Verifier
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimiter:
+    """Espaça o início dos pedidos para não passar de `rate` por segundo (0 desativa)."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            wait_for = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if wait_for > 0:
+            time.sleep(wait_for)
+
+
+def read_records(path):
+    """Lê os registos um a um, sem carregar o ficheiro inteiro em memória."""
+    with open(path, encoding="utf-8", newline="") as f:
+        rows = csv.DictReader(f) if path.lower().endswith(".csv") else (json.loads(line) for line in f if line.strip())
+        for number, row in enumerate(rows, 1):
+            row.setdefault("id", str(number))
+            row["id"] = str(row["id"])
+            yield row
+
+
+def completed_ids(output_path):
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    # Em binário: uma interrupção pode cortar a última linha a meio de um carácter UTF-8 (ex.: "ç")
+    with open(output_path, "rb") as f:
+        for line in f:
+            try:
+                result = json.loads(line)
+                record_id = str(result["id"])
+            except (ValueError, KeyError):  # UnicodeDecodeError também é um ValueError
+                continue  # linha truncada por uma interrupção: o registo será refeito
+            # Uma falha (cota, rede, resposta bloqueada) não conta como concluída: o registo é refeito
+            if "erro" not in result:
+                done.add(record_id)
+    return done
+
+
+def _end_last_line(output_path):
+    # Garante que uma linha truncada pela interrupção anterior não se cola à próxima
+    if not os.path.exists(output_path):
+        return
+    with open(output_path, "rb+") as f:
+        if f.seek(0, os.SEEK_END) > 0:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                f.write(b"\n")
+
+
+def _read_media(base_dir, path):
+    if not path:
+        return None
+    with open(os.path.join(base_dir, path), "rb") as f:
+        return f.read()
+
+
+def verify_record(verifier, record, base_dir="."):
+    started = time.perf_counter()
+    result = {"id": record["id"]}
+    try:
+        verification = verifier.verify(
+            record.get("texto") or None, _read_media(base_dir, record.get("imagem")), _read_media(base_dir, record.get("audio")),
+        )
+    except Exception as e:
+        result["erro"] = str(e)
+    else:
+        if not verification.analysis or "error" in verification.analysis:
+            result["erro"] = (verification.analysis or {}).get("error", "Análise vazia.")
+        elif verification.response in (VALIDATOR_BLOCKED, VALIDATOR_ERROR):
+            result["erro"] = verification.response
+        else:
+            result.update({
+                "risco": verification.analysis.get("risco"),
+                "analise": verification.analysis.get("analise"),
+                "fontes": verification.analysis.get("fontes", []),
+                "resposta": verification.response,
+                "origem": verification.source,
+                "similaridade": verification.similarity,
+                "indicadores": [{"tipo": i.kind, "valor": i.value, "risco": i.risk} for i in verification.indicators],
+            })
+    result["segundos"] = round(time.perf_counter() - started, 3)
+    return result
+
+
+def run_batch(records, output_path, verifier, concurrency=4, rate=0.0, base_dir="."):
+    """Verifica os registos com concorrência limitada e grava cada resultado assim que termina.
+
+    Devolve o número de registos processados nesta execução.
+    """
+    done = completed_ids(output_path)
+    _end_last_line(output_path)
+    limiter = RateLimiter(rate)
+    processed = 0
+    with open(output_path, "a", encoding="utf-8") as out, ThreadPoolExecutor(max_workers=concurrency) as executor:
+        def run(record):
+            limiter.acquire()
+            # Com a cota esgotada, os pedidos da interface (noutros processos) passam à frente dos do lote
+            with scheduler.priority(scheduler.BATCH):
+                return verify_record(verifier, record, base_dir)
+
+        pending = set()
+        for record in records:
+            if record["id"] in done:
+                continue
+            # No máximo 2x a concorrência em espera, para ler a entrada de forma incremental
+            if len(pending) >= concurrency * 2:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                processed += _write_results(out, finished)
+            pending.add(executor.submit(run, record))
+        processed += _write_results(out, pending)
+    return processed
+
+
+def _write_results(out, futures):
+    for future in futures:
+        out.write(json.dumps(future.result(), ensure_ascii=False) + "\n")
+    out.flush()
+    return len(futures)
+
+
+def _api_key():
+    if os.environ.get("GOOGLE_API_KEY"):
+        return os.environ["GOOGLE_API_KEY"]
+    import tomllib
+    with open(os.path.join(".streamlit", "secrets.toml"), "rb") as f:
+        return tomllib.load(f)["google_api"]["key"]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Verificação em lote de mensagens suspeitas.")
+    parser.add_argument("entrada", help="ficheiro .jsonl ou .csv com os registos")
+    parser.add_argument("-o", "--saida", required=True, help="ficheiro .jsonl de resultados (também serve de checkpoint)")
+    parser.add_argument("--concorrencia", type=int, default=4)
+    parser.add_argument("--por-segundo", type=float, default=0.0, help="limite de verificações iniciadas por segundo")
+    parser.add_argument("--modo", choices=[m for m in MODES if m != "streaming"], default="sequencial")
+    parser.add_argument("--backend", choices=["gemini", "fake"], default="gemini")
+    parser.add_argument("--latencia-fake", type=float, default=0.0, help="segundos injetados por chamada no backend fake")
+    parser.add_argument("--erros-fake", type=float, default=0.0, help="fração de chamadas do backend fake que falham com 429")
+    parser.add_argument("--cota-por-minuto", type=float, default=0.0, help="chamadas ao modelo por minuto (0 sem limite)")
+    parser.add_argument("--sem-cache", action="store_true", help="não consulta nem grava o cache de veredictos nem os índices")
+    parser.add_argument("--porta-metricas", type=int, default=0, help="serve /metrics (Prometheus) nesta porta durante a execução")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    if args.porta_metricas:
+        metrics.start_http_server(args.porta_metricas)
+    scheduler.configure(args.cota_por_minuto)
+    if args.backend == "fake":
+        from backends import FakeBackend
+        agents.use_registry(FakeBackend(latency=args.latencia_fake, error_rate=args.erros_fake))
+    else:
+        agents.configure(_api_key())
+
+    rules = RuleEngine()
+    cache = index = indicators = None
+    if not args.sem_cache:
+        cache, index, indicators = VerdictCache(), SimilarityIndex(), IndicatorIndex(rules=rules)
+    verifier = Verifier(cache, index, rules, mode=args.modo, indicators=indicators)
+
+    started = time.perf_counter()
+    processed = run_batch(
+        read_records(args.entrada), args.saida, verifier, args.concorrencia, args.por_segundo,
+        base_dir=os.path.dirname(os.path.abspath(args.entrada)),
+    )
+    elapsed = time.perf_counter() - started
+    print(f"{processed} registos verificados em {elapsed:.1f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Mede o débito do pré-classificador local (mensagens/segundo).
+
+Uso: python benchmarks/bench_heuristics.py [--n 50000]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from heuristics import RuleEngine  # noqa: E402
+
+SAMPLES = [
+    "Olá {nome}, sua conta será bloqueada hoje. Regularize seu cadastro em bit.ly/{codigo} para evitar o cancelamento.",
+    "Oi mãe, troquei de número, salva esse aqui. Preciso que você faça um pix urgente de R$ {valor} pra mim.",
+    "Parabéns {nome}! Você ganhou um prêmio. Pague a taxa de liberação via Pix: 00020101021126580014br.gov.bcb.pix0136{codigo}5204000053039865802BR6304AB12",
+    "Oi {nome}, tudo bem? Vamos almoçar amanhã às 12h no restaurante de sempre?",
+    "Sua encomenda está retida. Acesse https://correios-rastreio.{codigo}.xyz/pagar e pague R$ {valor}.",
+    "Reunião remarcada para quinta-feira. Qualquer dúvida me liga no (11) 98765-4321.",
+]
+
+
+def build_corpus(n, seed=42):
+    rng = random.Random(seed)
+    names = ["Maria", "João", "Ana", "Carlos", "Fernanda", "Pedro"]
+    return [
+        rng.choice(SAMPLES).format(nome=rng.choice(names), codigo=f"{rng.getrandbits(40):x}", valor=f"{rng.randint(50, 5000)},00")
+        for _ in range(n)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--n", type=int, default=50_000)
+    args = parser.parse_args()
+
+    engine = RuleEngine()
+    corpus = build_corpus(args.n)
+    engine.scan(corpus[0])  # aquece a compilação
+
+    start = time.perf_counter()
+    fast_path = sum(1 for text in corpus if engine.classify(text) is not None)
+    elapsed = time.perf_counter() - start
+
+    print(json.dumps({
+        "mensagens": args.n,
+        "segundos": round(elapsed, 4),
+        "mensagens_por_segundo": round(args.n / elapsed),
+        "us_por_mensagem": round(elapsed / args.n * 1e6, 2),
+        "resolvidas_localmente": fast_path,
+    }, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
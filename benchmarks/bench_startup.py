@@ -0,0 +1,95 @@
+"""Benchmark do arranque a frio: tempo de importação e tempo até à primeira página servida.
+
+Cada medição corre num processo Python novo, para que nenhum módulo venha já carregado.
+- `importacao`: tempo de `import` de cada dependência e do conjunto importado no arranque da aplicação;
+- `primeira_resposta`: primeira execução completa do script (como na primeira visita a uma réplica nova)
+  e uma segunda execução (rerun), via `streamlit.testing`, com o backend fake no lugar do Gemini.
+
+Uso: python benchmarks/bench_startup.py [--repeticoes 5] [--saida startup.json]
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Importado pelo streamlit_app.py antes de servir a primeira página
+STARTUP_MODULES = ["streamlit", "metrics", "pipeline", "agents", "ui"]
+# Dependências pesadas, carregadas só quando uma página ou funcionalidade as usa
+DEFERRED_MODULES = ["verifier_page", "protect_page", "streamlit_mic_recorder", "fpdf", "pandas", "altair"]
+
+IMPORT_SNIPPET = """
+import sys, time
+sys.path.insert(0, {root!r})
+started = time.perf_counter()
+import streamlit
+base = time.perf_counter()
+for name in {modules!r}:
+    __import__(name)
+print(time.perf_counter() - (started if {include_streamlit!r} else base))
+"""
+
+APP_SNIPPET = """
+import json, sys, time
+sys.path.insert(0, {root!r})
+started = time.perf_counter()
+import agents
+from backends import FakeBackend
+from streamlit.testing.v1 import AppTest
+
+agents.configure = lambda *a, **k: agents.use_registry(FakeBackend())
+app = AppTest.from_file("streamlit_app.py", default_timeout=60)
+app.secrets["google_api"] = {{"key": "bench"}}
+app.secrets["verificador"] = {{"aquecer_ligacao": False, "porta_metricas": 0}}
+first = time.perf_counter()
+app.run()
+assert not app.exception, app.exception
+done = time.perf_counter()
+app.run()
+print(json.dumps({{"primeira_execucao_s": done - first, "desde_o_arranque_s": done - started,
+                  "rerun_s": time.perf_counter() - done}}))
+"""
+
+
+def _python(code):
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    return result.stdout.strip().splitlines()[-1]
+
+
+def import_time(modules, include_streamlit=False):
+    return float(_python(IMPORT_SNIPPET.format(root=ROOT, modules=modules, include_streamlit=include_streamlit)))
+
+
+def _median(values):
+    ordered = sorted(values)
+    return round(ordered[len(ordered) // 2], 4)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--saida", help="grava o JSON neste ficheiro além de o imprimir")
+    args = parser.parse_args()
+
+    repeat = range(args.repeticoes)
+    # Tempos em segundos (mediana das repetições); os módulos individuais descontam o import do streamlit
+    imports = {name: _median([import_time([name]) for _ in repeat]) for name in STARTUP_MODULES[1:] + DEFERRED_MODULES}
+    imports["arranque_da_aplicacao"] = _median([import_time(STARTUP_MODULES, include_streamlit=True) for _ in repeat])
+    runs = [json.loads(_python(APP_SNIPPET.format(root=ROOT))) for _ in repeat]
+    results = {
+        "python": platform.python_version(),
+        "importacao_s": imports,
+        "primeira_resposta": {key: _median([run[key] for run in runs]) for key in runs[0]},
+    }
+    output = json.dumps(results, ensure_ascii=False, indent=2)
+    print(output)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
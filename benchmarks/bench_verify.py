@@ -0,0 +1,108 @@
+"""Benchmark offline do fluxo de verificação, com o backend fake no lugar do Gemini.
+
+Mede separadamente o custo da própria aplicação (interpretação das secções, geração do PDF) e o
+débito ponta a ponta com N sessões simultâneas. O resultado é um JSON, para comparar versões.
+
+Uso: python benchmarks/bench_verify.py [--sessoes 8] [--pedidos 200] [--latencia 0.05] [--saida bench.json]
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import agents  # noqa: E402
+from backends import FakeBackend  # noqa: E402
+from metrics import counters, percentile  # noqa: E402
+from report import generate_pdf, parse_sections, recommendation_items  # noqa: E402
+from verifier import Verifier  # noqa: E402
+
+SAMPLE_RESPONSE = (
+    "### Análise Detalhada\n" + "A mensagem apresenta sinais típicos de phishing, com senso de urgência. " * 20 + "\n"
+    "### Recomendações de Segurança\n" + "".join(f"{i}. **Não** clique no link recebido ({i}).\n" for i in range(1, 9))
+    + "### Fontes Consultadas\n- https://www.gov.br/anatel\n- https://www.bcb.gov.br\n"
+)
+
+
+def bench_loop(fn, iterations):
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return _summary(timings)
+
+
+def _summary(timings):
+    total = sum(timings)
+    return {
+        "n": len(timings),
+        "ops_por_segundo": round(len(timings) / total, 1) if total else None,
+        "p50_ms": round(percentile(timings, 0.5) * 1000, 3),
+        "p95_ms": round(percentile(timings, 0.95) * 1000, 3),
+    }
+
+
+def parse_response(response):
+    sections = parse_sections(response)
+    return recommendation_items(sections.get("Recomendações de Segurança", ""))
+
+
+def bench_end_to_end(sessions, requests, latency, mode):
+    agents.use_registry(FakeBackend(latency=latency))
+    # Sem cache nem regras: todos os pedidos percorrem Analisador e Validador
+    verifier = Verifier(mode=mode)
+    timings = []
+    lock = threading.Lock()
+
+    def session_request(i):
+        start = time.perf_counter()
+        verification = verifier.verify(f"Mensagem simulada número {i}: confirme seus dados no link enviado.")
+        parse_response(verification.response)
+        generate_pdf(f"Relatorio de Analise - Risco {verification.analysis['risco'].upper()}", verification.response)
+        with lock:
+            timings.append(time.perf_counter() - start)
+
+    coalesced = counters().get(("pedidos_agrupados", ()), 0)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions) as executor:
+        list(executor.map(session_request, range(requests)))
+    elapsed = time.perf_counter() - start
+    result = _summary(timings)
+    result.update({"sessoes": sessions, "latencia_fake_s": latency, "modo": mode,
+                   "pedidos_por_segundo": round(requests / elapsed, 1),
+                   # Deve ser 0: mensagens diferentes não podem partilhar chamadas ao modelo
+                   "pedidos_agrupados": int(counters().get(("pedidos_agrupados", ()), 0) - coalesced)})
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessoes", type=int, default=8)
+    parser.add_argument("--pedidos", type=int, default=200)
+    parser.add_argument("--iteracoes", type=int, default=500)
+    parser.add_argument("--latencia", type=float, default=0.0, help="latência injetada por chamada ao modelo (s)")
+    parser.add_argument("--modo", choices=["sequencial", "combinado"], default="sequencial")
+    parser.add_argument("--saida", help="grava o JSON neste ficheiro além de o imprimir")
+    args = parser.parse_args()
+
+    results = {
+        "python": platform.python_version(),
+        "parse_sections": bench_loop(lambda: parse_response(SAMPLE_RESPONSE), args.iteracoes),
+        "generate_pdf": bench_loop(lambda: generate_pdf("Relatorio de Analise - Risco ALTO", SAMPLE_RESPONSE), max(1, args.iteracoes // 10)),
+        "ponta_a_ponta": bench_end_to_end(args.sessoes, args.pedidos, args.latencia, args.modo),
+    }
+    output = json.dumps(results, ensure_ascii=False, indent=2)
+    print(output)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""Pré-classificador local por regras: resolve casos óbvios sem chamar a IA."""
+import ipaddress
+import json
+import os
+import re
+import threading
+import time
+
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "rules.json")
+RELOAD_INTERVAL = 2.0  # segundos entre verificações do mtime do ficheiro de regras
+
+# Mapeamento 1:1 de caracteres, para que as posições no texto normalizado valham no original
+_ACCENTS = str.maketrans("áàâãäéèêëíìîïóòôõöúùûüçñ", "aaaaaeeeeiiiiooooouuuucn")
+
+# Extratores partilhados; a ordem importa: o Pix Copia e Cola contém "br.gov.bcb.pix" e o e-mail contém um domínio
+_EXTRACTORS = [
+    ("pix", r"000201[^\n]{0,400}?br\.gov\.bcb\.pix[^\n]{0,400}?6304[0-9a-f]{4}"),
+    ("email", r"\b[\w.+-]+@(?:[a-z0-9-]+\.)+[a-z]{2,}\b"),
+    ("url", r"\b(?:https?://|www\.)[^\s<>\"']+|\b(?:[a-z0-9-]+\.)+[a-z]{2,}/[^\s<>\"']*"),
+    ("pixkey", r"\b[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\b"),
+    ("cnpj", r"(?<![\w/.])\d{2}\.?\d{3}\.?\d{3}/?\d{4}-?\d{2}\b"),
+    ("phone", r"(?<![\w/])(?:\+?55[\s-]?)?\(?[1-9]{2}\)?[\s-]?9?\d{4}[\s-]?\d{4}\b"),
+    ("domain", r"\b(?:[a-z0-9-]+\.)+(?:com|net|org|br|ly|io|me|co|cc|gl|gd|at|ai|app|info|biz|"
+               r"xyz|top|tk|ml|ga|cf|gq|click|buzz|rest|cam|icu|live|shop|online|site)\b"),
+]
+
+
+def normalize(text):
+    return (text or "").lower().translate(_ACCENTS)
+
+
+def domain_of(url):
+    host = re.sub(r"^(?:https?://)?", "", url).split("/", 1)[0].split("?", 1)[0].split(":", 1)[0]
+    return host[4:] if host.startswith("www.") else host
+
+
+class Scan:
+    __slots__ = ("score", "signals", "urls", "domains", "phones", "emails", "pix", "cnpjs")
+
+    def __init__(self):
+        self.score = 0.0
+        self.signals = []
+        self.urls, self.domains, self.phones, self.emails, self.pix, self.cnpjs = [], [], [], [], [], []
+
+
+class RuleEngine:
+    """Aplica as regras em duas passagens de regex (extratores e padrões) e devolve uma pontuação ponderada.
+
+    As passagens são separadas porque as correspondências de um `finditer` não se sobrepõem: um padrão com
+    `.{0,80}` consumiria os links e telefones no meio. Pela mesma razão, os padrões correm em lookahead.
+
+    O ficheiro de regras é recarregado automaticamente quando o seu mtime muda.
+    """
+
+    def __init__(self, path=DEFAULT_RULES_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._checked = 0.0
+        self._compiled = None
+        self.reload()
+
+    def reload(self):
+        with open(self.path, encoding="utf-8") as f:
+            rules = json.load(f)
+        extractors = re.compile("|".join(f"(?P<{name}>{pattern})" for name, pattern in _EXTRACTORS), re.S)
+        groups, patterns = [], {}
+        for i, rule in enumerate(rules["padroes"]):
+            # Lookahead: o padrão não consome texto, e um padrão longo não esconde outro que comece mais à frente
+            groups.append(f"(?=(?P<r{i}>{rule['regex']}))")
+            patterns[f"r{i}"] = (rule["peso"], rule["descricao"])
+        # Troca atómica: as threads em curso continuam com o conjunto anterior
+        self._compiled = (
+            (extractors, re.compile("|".join(groups), re.S)), patterns, rules["sinais"], rules["limiar_alto"], rules["limiar_medio"],
+            frozenset(rules["encurtadores"]), frozenset(rules["tlds_suspeitos"]), frozenset(rules["dominios_maliciosos"]),
+        )
+        self._mtime = os.stat(self.path).st_mtime
+
+    def _maybe_reload(self):
+        now = time.monotonic()
+        if now - self._checked < RELOAD_INTERVAL:
+            return
+        with self._lock:
+            self._checked = now
+            try:
+                if os.stat(self.path).st_mtime != self._mtime:
+                    self.reload()
+            except (OSError, ValueError, KeyError, re.error):
+                pass  # mantém as regras anteriores se o ficheiro novo estiver inválido
+
+    def scan(self, text):
+        self._maybe_reload()
+        (extractors, rule_regex), patterns, signals, _, _, shorteners, bad_tlds, bad_domains = self._compiled
+        result = Scan()
+        fired = {}
+        text = normalize(text)
+        for match in rule_regex.finditer(text):
+            fired.setdefault(match.lastgroup, patterns[match.lastgroup])
+        for match in extractors.finditer(text):
+            kind, value = match.lastgroup, match.group()
+            if kind == "pix":
+                result.pix.append(value)
+                fired.setdefault("pix_copia_cola", signals["pix_copia_cola"])
+            elif kind == "pixkey":
+                result.pix.append(value)
+                fired.setdefault("chave_pix_aleatoria", signals["chave_pix_aleatoria"])
+            elif kind == "phone":
+                result.phones.append(re.sub(r"\D", "", value))
+                fired.setdefault("telefone", signals["telefone"])
+            elif kind == "email":
+                result.emails.append(value)
+            elif kind == "cnpj":
+                result.cnpjs.append(re.sub(r"\D", "", value))
+            else:
+                if kind == "url":
+                    result.urls.append(value)
+                domain = domain_of(value)
+                result.domains.append(domain)
+                suffixes = [".".join(domain.split(".")[i:]) for i in range(domain.count(".") + 1)]
+                if any(s in bad_domains for s in suffixes):
+                    fired.setdefault("dominio_malicioso", signals["dominio_malicioso"])
+                if domain in shorteners:
+                    fired.setdefault("url_encurtada", signals["url_encurtada"])
+                if suffixes[-1] in bad_tlds:
+                    fired.setdefault("tld_suspeito", signals["tld_suspeito"])
+                try:
+                    ipaddress.ip_address(domain)
+                    fired.setdefault("url_ip", signals["url_ip"])
+                except ValueError:
+                    pass
+        for rule in fired.values():
+            weight, description = (rule["peso"], rule["descricao"]) if isinstance(rule, dict) else rule
+            result.score += weight
+            result.signals.append(description)
+        return result
+
+    def classify(self, text, scan=None):
+        """Devolve um dict no formato de `call_analyzer_agent` quando o texto é claramente fraudulento, senão `None`."""
+        scan = scan or self.scan(text)
+        high = self._compiled[3]
+        if scan.score < high:
+            return None
+        return {
+            "analise": f"Classificação local por regras (pontuação {scan.score:.1f}). Sinais encontrados: " + "; ".join(scan.signals) + ".",
+            "risco": "Alto",
+            "fontes": [],
+        }
+
+    @property
+    def shorteners(self):
+        return self._compiled[5]
+
+    def risk(self, score):
+        _, _, _, high, medium, _, _, _ = self._compiled
+        return "Alto" if score >= high else "Médio" if score >= medium else "Baixo"
@@ -0,0 +1,277 @@
+"""Índice persistente de indicadores de golpe (domínios, URLs, telefones, chaves Pix, CNPJs e e-mails).
+
+Cada verificação grava os indicadores da mensagem com o risco atribuído; numa nova mensagem, os indicadores
+já conhecidos são sinalizados antes da chamada ao modelo. Um filtro de Bloom em memória responde "desconhecido"
+sem tocar no SQLite, que é o caso comum; só os candidatos seguem para a consulta pela chave primária.
+
+Importação de listas externas: python ioc_index.py lista.txt --tipo dominio --risco Alto --origem phishing-army
+"""
+import argparse
+import csv
+import hashlib
+import math
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from collections import namedtuple
+
+from heuristics import RuleEngine, domain_of
+from metrics import increment
+from storage import open_db, transaction
+
+DEFAULT_PATH = os.path.join(".cache", "indicadores.sqlite3")
+KINDS = ("dominio", "url", "telefone", "pix", "cnpj", "email", "fonte")
+# Aprendidos dos veredictos: só valores que identificam o golpista. Domínios, CNPJs e e-mails ficam de fora,
+# porque as mensagens de golpe citam também a empresa legítima que imitam; esses vêm só de listas de bloqueio
+LEARNED_KINDS = frozenset({"url", "telefone", "pix"})
+RISKS = ("Baixo", "Médio", "Alto")
+SYNC_INTERVAL = 2.0  # segundos entre sincronizações do filtro com o que outros processos gravaram
+BLOOM_MIN_CAPACITY = 1_000_000
+BLOOM_ERROR_RATE = 0.01
+IMPORT_BATCH = 50_000
+
+Indicator = namedtuple("Indicator", ["kind", "value", "risk", "origin", "last_seen", "hits"])
+
+# Num conflito fica o risco mais grave (um veredicto "Baixo" do modelo não apaga uma entrada de lista de bloqueio)
+# e a origem de lista, quando houver; instr() ordena os riscos pela posição em 'BaixoMédioAlto'
+_HIGHER = "instr('BaixoMédioAlto', excluded.risk) > instr('BaixoMédioAlto', risk)"
+_UPSERT = f"""INSERT INTO indicators (kind, value, risk, origin, first_seen, last_seen, hits) VALUES (?, ?, ?, ?, ?, ?, 1)
+    ON CONFLICT (kind, value) DO UPDATE SET
+        risk = CASE WHEN {_HIGHER} THEN excluded.risk ELSE risk END,
+        origin = CASE WHEN excluded.origin LIKE 'lista%' OR (origin NOT LIKE 'lista%' AND {_HIGHER})
+                      THEN excluded.origin ELSE origin END,
+        last_seen = excluded.last_seen, hits = hits + 1"""
+
+
+def valid_cnpj(digits):
+    if len(digits) != 14 or len(set(digits)) == 1:
+        return False
+    numbers = [int(d) for d in digits]
+    for size in (12, 13):
+        weights = list(range(size - 7, 1, -1)) + list(range(9, 1, -1))
+        check = sum(n * w for n, w in zip(numbers, weights)) % 11
+        if numbers[size] != (0 if check < 2 else 11 - check):
+            return False
+    return True
+
+
+def _tlv(payload):
+    # Campos EMV do Pix Copia e Cola: 2 dígitos de id, 2 de tamanho e o valor
+    fields, pos = {}, 0
+    while pos + 4 <= len(payload):
+        tag, size = payload[pos:pos + 2], payload[pos + 2:pos + 4]
+        if not size.isdigit():
+            break
+        fields[tag] = payload[pos + 4:pos + 4 + int(size)]
+        pos += 4 + int(size)
+    return fields
+
+
+def pix_key_of(payload):
+    """Chave Pix (campo 26, subcampo 01) de um Pix Copia e Cola; o valor e o identificador mudam, a chave não."""
+    return _tlv(_tlv(payload).get("26", "")).get("01") or payload
+
+
+def normalize_indicator(kind, value):
+    value = value.strip().lower()
+    if kind == "url":
+        value = re.sub(r"^(?:https?://)?(?:www\.)?", "", value).rstrip(".,;:!?)/")
+    elif kind in ("dominio", "fonte"):
+        value = domain_of(value)
+    elif kind in ("telefone", "cnpj"):
+        value = re.sub(r"\D", "", value)
+        if kind == "telefone" and len(value) in (12, 13) and value.startswith("55"):
+            value = value[2:]  # guarda DDD + número, com ou sem o código do país
+    elif kind == "pix" and value.startswith("000201"):
+        value = pix_key_of(value)
+    return value
+
+
+def is_flagged(indicator):
+    """Indicadores que merecem aviso: de listas de bloqueio, ou de risco alto num tipo aprendido dos veredictos."""
+    if indicator.origin.startswith("lista"):
+        return True
+    return indicator.risk == "Alto" and indicator.kind in LEARNED_KINDS
+
+
+def indicators_from_scan(scan, shorteners=frozenset()):
+    found = set()
+    for kind, values in (("url", scan.urls), ("dominio", scan.domains), ("telefone", scan.phones),
+                         ("email", scan.emails), ("pix", scan.pix)):
+        found.update((kind, normalize_indicator(kind, v)) for v in values)
+    found.update(("cnpj", v) for v in scan.cnpjs if valid_cnpj(v))
+    # "www.banco.com.br" sem caminho é só um domínio, e como tal não pode ser aprendido de um veredicto
+    found = {(kind, value) for kind, value in found if kind != "url" or "/" in value}
+    # Um encurtador (bit.ly...) não diz nada sobre a mensagem; só o link completo é um indicador
+    return {(kind, value) for kind, value in found if value and not (kind == "dominio" and value in shorteners)}
+
+
+class BloomFilter:
+    """Conjunto probabilístico: `in` nunca falha um item adicionado e erra "sim" em ~`error_rate` dos restantes."""
+
+    def __init__(self, capacity, error_rate=BLOOM_ERROR_RATE):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+        self._lock = threading.Lock()
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1, h2 = int.from_bytes(digest[:8], "big"), int.from_bytes(digest[8:], "big") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, item):
+        positions = self._positions(item)
+        with self._lock:  # |= num bytearray não é atómico entre threads
+            for p in positions:
+                self._bits[p >> 3] |= 1 << (p & 7)
+
+    def __contains__(self, item):
+        return all(self._bits[p >> 3] & (1 << (p & 7)) for p in self._positions(item))
+
+
+def _bloom_key(kind, value):
+    return f"{kind}\x1f{value}"
+
+
+class IndicatorIndex:
+    """Indicadores em SQLite (chave primária (tipo, valor), sem rowid), com risco, origem e última ocorrência.
+
+    O filtro de Bloom é construído em segundo plano; até ficar pronto, as consultas vão direto ao SQLite.
+    """
+
+    def __init__(self, path=DEFAULT_PATH, rules=None, bloom=True):
+        self.path = path
+        self.rules = rules or RuleEngine()
+        self._lock = threading.Lock()
+        self._conn = open_db(path)
+        self._conn.execute("""CREATE TABLE IF NOT EXISTS indicators (
+            kind TEXT NOT NULL, value TEXT NOT NULL, risk TEXT NOT NULL, origin TEXT NOT NULL,
+            first_seen REAL NOT NULL, last_seen REAL NOT NULL, hits INTEGER NOT NULL,
+            PRIMARY KEY (kind, value)) WITHOUT ROWID""")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_indicators_first_seen ON indicators(first_seen)")
+        self._bloom = None
+        self._synced = 0.0  # first_seen mais recente já presente no filtro
+        self._checked = 0.0
+        if bloom:
+            threading.Thread(target=self._build_bloom, daemon=True, name="indicadores-bloom").start()
+
+    def _build_bloom(self):
+        started = time.time()
+        with self._lock:
+            count = self._conn.execute("SELECT COUNT(*) FROM indicators").fetchone()[0]
+        bloom = BloomFilter(max(BLOOM_MIN_CAPACITY, count * 2))
+        # Ligação própria: a leitura completa não bloqueia as consultas das sessões
+        conn = sqlite3.connect(self.path)
+        try:
+            for kind, value in conn.execute("SELECT kind, value FROM indicators"):
+                bloom.add(_bloom_key(kind, value))
+        finally:
+            conn.close()
+        self._synced = started - SYNC_INTERVAL  # o que foi gravado durante a construção entra na próxima sincronização
+        self._bloom = bloom
+
+    def _maybe_sync(self):
+        now = time.monotonic()
+        if self._bloom is None or now - self._checked < SYNC_INTERVAL:
+            return
+        with self._lock:
+            self._checked = now
+            rows = self._conn.execute(
+                "SELECT kind, value, first_seen FROM indicators WHERE first_seen >= ?", (self._synced,)
+            ).fetchall()
+        for kind, value, first_seen in rows:
+            self._bloom.add(_bloom_key(kind, value))
+            self._synced = max(self._synced, first_seen)
+
+    def extract(self, text, scan=None):
+        return indicators_from_scan(scan or self.rules.scan(text), self.rules.shorteners) if text else set()
+
+    def lookup(self, indicators):
+        """Devolve os indicadores já conhecidos, do mais grave para o menos grave."""
+        self._maybe_sync()
+        bloom = self._bloom
+        candidates = [i for i in indicators if bloom is None or _bloom_key(*i) in bloom]
+        known = []
+        if candidates:
+            with self._lock:
+                for kind, value in candidates:
+                    row = self._conn.execute(
+                        "SELECT kind, value, risk, origin, last_seen, hits FROM indicators WHERE kind = ? AND value = ?",
+                        (kind, value),
+                    ).fetchone()
+                    if row:
+                        known.append(Indicator(*row))
+        increment("consultas_indicadores", resultado="conhecido" if known else "desconhecido")
+        return sorted(known, key=lambda i: RISKS.index(i.risk) if i.risk in RISKS else -1, reverse=True)
+
+    def add(self, indicators, risk, origin="verificacao"):
+        rows = [(kind, value, risk, origin, time.time(), time.time()) for kind, value in indicators]
+        with self._lock, transaction(self._conn):
+            self._conn.executemany(_UPSERT, rows)
+        if self._bloom is not None:
+            for kind, value, *_ in rows:
+                self._bloom.add(_bloom_key(kind, value))
+        return len(rows)
+
+    def record(self, text, risk, sources=()):
+        """Grava os indicadores de uma mensagem analisada e os domínios das fontes citadas pelo modelo.
+
+        Da mensagem só se guardam os tipos de `LEARNED_KINDS`; as fontes são guardadas como tipo "fonte"
+        (em geral, os sites que documentam o golpe), nunca como "dominio".
+        """
+        indicators = {(kind, value) for kind, value in self.extract(text) if kind in LEARNED_KINDS}
+        indicators.update(("fonte", normalize_indicator("fonte", url)) for url in sources or () if isinstance(url, str))
+        indicators.discard(("fonte", ""))
+        if indicators and risk in RISKS:
+            self.add(indicators, risk)
+
+    def import_rows(self, rows, risk="Alto", origin="lista"):
+        """Importa pares (tipo, valor) em lotes de uma transação cada; devolve quantos foram gravados."""
+        total, batch = 0, []
+        for row in rows:
+            kind, value = row[0], normalize_indicator(row[0], row[1])
+            if kind in KINDS and value:
+                batch.append((kind, value))
+            if len(batch) >= IMPORT_BATCH:
+                total += self.add(batch, risk, origin)
+                batch = []
+        if batch:
+            total += self.add(batch, risk, origin)
+        return total
+
+
+def read_blocklist(path, kind=None):
+    """Lê uma lista de bloqueio: um valor por linha (com `kind`), formato hosts, ou CSV `tipo,valor`."""
+    with open(path, encoding="utf-8", newline="") as f:
+        if kind is None:
+            for row in csv.reader(f):
+                if len(row) >= 2 and not row[0].startswith("#"):
+                    yield row[0].strip(), row[1]
+            return
+        for line in f:
+            line = line.split("#", 1)[0].strip()
+            if line:
+                yield kind, line.split()[-1]  # "0.0.0.0 dominio.com" (formato hosts) ou só "dominio.com"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Importação de listas de indicadores de golpe.")
+    parser.add_argument("lista", help="ficheiro com um valor por linha (com --tipo) ou CSV tipo,valor")
+    parser.add_argument("--tipo", choices=KINDS, help="tipo de todos os valores do ficheiro")
+    parser.add_argument("--risco", choices=RISKS, default="Alto")
+    parser.add_argument("--origem", default="lista", help="nome da lista, guardado com cada indicador")
+    parser.add_argument("--base", default=DEFAULT_PATH, help="ficheiro SQLite do índice")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    index = IndicatorIndex(args.base, bloom=False)  # a importação só escreve; o filtro é das réplicas que consultam
+    total = index.import_rows(read_blocklist(args.lista, args.tipo), args.risco, f"lista:{args.origem}")
+    print(f"{total} indicadores importados em {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
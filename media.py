@@ -0,0 +1,109 @@
+"""Compactação de imagens e áudios antes do envio ao modelo."""
+import io
+import logging
+import os
+import threading
+from collections import namedtuple
+
+from PIL import Image, ImageOps
+
+from metrics import increment
+from pipeline import DEFAULT_MAX_EDGE, DEFAULT_QUALITY  # noqa: F401 (reexportados)
+
+try:
+    from pydub import AudioSegment
+    from pydub.silence import split_on_silence
+except ImportError:  # pydub (e ffmpeg) é opcional: sem ele o áudio segue original, com o mime type correto
+    AudioSegment = None
+
+AUDIO_SAMPLE_RATE = 16000
+AUDIO_BITRATE = "24k"
+# Passo (ms) da deteção de silêncio: com o padrão de 1 ms custa ~1,4 s de CPU por minuto de áudio, com 20 ms ~0,07 s
+SILENCE_SEEK_STEP = 20
+# Formatos que o modelo aceita tal como vieram, quando a recompressão não poupa bytes
+ORIGINAL_IMAGE_MIMES = frozenset({"image/jpeg", "image/png", "image/webp"})
+METADATA_KEYS = ("xmp", "XML:com.adobe.xmp", "comment")
+
+logger = logging.getLogger(__name__)
+# Limita a compactação a metade dos núcleos, para não atrasar as restantes sessões
+_cpu_slots = threading.BoundedSemaphore(max(1, (os.cpu_count() or 2) // 2))
+
+CompactedMedia = namedtuple("CompactedMedia", ["data", "mime_type", "original_size"])
+
+
+def _report(kind, media):
+    # Dois contadores (só crescem, como pede o Prometheus): a poupança é a diferença e pode ser negativa
+    increment("bytes_originais", media.original_size, tipo=kind)
+    increment("bytes_enviados", len(media.data), tipo=kind)
+    logger.info("%s: %d -> %d bytes, %+d poupados (%s)", kind, media.original_size, len(media.data),
+                media.original_size - len(media.data), media.mime_type)
+    return media
+
+
+def sniff_audio_mime(data):
+    if data[:4] == b"RIFF" and data[8:12] == b"WAVE":
+        return "audio/wav"
+    if data[:4] == b"OggS":
+        return "audio/ogg"
+    if data[:4] == b"fLaC":
+        return "audio/flac"
+    if data[:4] == b"\x1a\x45\xdf\xa3":
+        return "audio/webm"  # formato padrão do streamlit_mic_recorder
+    if data[4:8] == b"ftyp":
+        return "audio/mp4"
+    if data[:3] == b"ID3" or (len(data) > 1 and data[0] == 0xFF and data[1] & 0xE0 == 0xE0):
+        return "audio/mp3"
+    return "audio/wav"
+
+
+def _has_metadata(image):
+    return bool(image.getexif()) or any(key in image.info for key in METADATA_KEYS)
+
+
+def _flatten(image):
+    # O JPEG não tem transparência: as zonas transparentes ficam brancas (e não pretas, como com convert("RGB"))
+    if image.mode in ("RGBA", "LA", "PA") or "transparency" in image.info:
+        image = image.convert("RGBA")
+        background = Image.new("RGB", image.size, "white")
+        background.paste(image, mask=image.getchannel("A"))
+        return background
+    return image if image.mode == "RGB" else image.convert("RGB")
+
+
+def compact_image(data, max_edge=DEFAULT_MAX_EDGE, quality=DEFAULT_QUALITY):
+    with _cpu_slots:
+        image = Image.open(io.BytesIO(data))
+        original_mime = Image.MIME.get(image.format)
+        # O original só pode seguir tal como veio se não for reduzido nem trouxer metadados (localização, aparelho, etc.)
+        reusable = original_mime in ORIGINAL_IMAGE_MIMES and max(image.size) <= max_edge and not _has_metadata(image)
+        image = ImageOps.exif_transpose(image)  # aplica a orientação antes de descartar o EXIF
+        image.thumbnail((max_edge, max_edge), Image.LANCZOS)
+        image = _flatten(image)
+        output = io.BytesIO()
+        # Regravar sem passar exif/icc_profile remove os metadados
+        image.save(output, format="JPEG", quality=quality, optimize=True)
+    if reusable and output.tell() >= len(data):
+        return _report("imagem", CompactedMedia(data, original_mime, len(data)))
+    return _report("imagem", CompactedMedia(output.getvalue(), "image/jpeg", len(data)))
+
+
+def compact_audio(data):
+    original = CompactedMedia(data, sniff_audio_mime(data), len(data))
+    if AudioSegment is None:
+        return _report("audio", original)
+    try:
+        with _cpu_slots:
+            segment = AudioSegment.from_file(io.BytesIO(data))
+            segment = segment.set_channels(1).set_frame_rate(AUDIO_SAMPLE_RATE)
+            # Remove silêncios longos (início, fim e pausas) mantendo 300 ms de margem
+            chunks = split_on_silence(segment, min_silence_len=1000, silence_thresh=segment.dBFS - 16, keep_silence=300,
+                                      seek_step=SILENCE_SEEK_STEP)
+            if chunks:
+                segment = sum(chunks[1:], chunks[0])
+            output = io.BytesIO()
+            segment.export(output, format="ogg", codec="libopus", bitrate=AUDIO_BITRATE)
+    except Exception as e:  # ffmpeg ausente ou formato não suportado
+        logger.warning("Falha ao compactar áudio, enviando original: %s", e)
+        return _report("audio", original)
+    compacted = CompactedMedia(output.getvalue(), "audio/ogg", len(data))
+    return _report("audio", compacted if len(compacted.data) < len(data) else original)
@@ -0,0 +1,143 @@
+"""Métricas por processo: latência por etapa (histogramas e percentis), contadores e exportação Prometheus."""
+import json
+import logging
+import math
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+WINDOW = 1000  # últimas amostras consideradas nos percentis de cada métrica
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+PREFIX = "verificador"
+
+logger = logging.getLogger(__name__)
+_lock = threading.Lock()
+_samples = defaultdict(lambda: deque(maxlen=WINDOW))
+_histograms = defaultdict(lambda: [[0] * len(BUCKETS), 0.0, 0])  # contagens por balde, soma, total
+_counters = defaultdict(float)
+
+
+def _nearest_rank(ordered, q):
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))]
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    return _nearest_rank(sorted(values), q)
+
+
+def record_latency(name, seconds):
+    # O registo por amostra custa uma cópia e uma ordenação da janela: só quando o nível INFO está ativo
+    log = logger.isEnabledFor(logging.INFO)
+    with _lock:
+        samples = _samples[name]
+        samples.append(seconds)
+        snapshot = list(samples) if log else None
+        histogram = _histograms[name]
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                histogram[0][i] += 1
+                break
+        histogram[1] += seconds
+        histogram[2] += 1
+    if not log:
+        return
+    # Registo estruturado (uma linha JSON por amostra), para recolha por agregadores de logs
+    ordered = sorted(snapshot)
+    logger.info(json.dumps({
+        "etapa": name, "segundos": round(seconds, 4), "p50": round(_nearest_rank(ordered, 0.5), 4),
+        "p95": round(_nearest_rank(ordered, 0.95), 4), "n": len(ordered),
+    }))
+
+
+@contextmanager
+def span(stage):
+    """Mede a duração de uma etapa; exceções são contadas em `erros_etapa` e propagadas."""
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        increment("erros_etapa", etapa=stage)
+        raise
+    finally:
+        record_latency(stage, time.perf_counter() - started)
+
+
+def latency_summary():
+    with _lock:
+        snapshot = {name: list(samples) for name, samples in _samples.items()}
+    return {
+        name: {"n": len(values), "p50": percentile(values, 0.5), "p95": percentile(values, 0.95)}
+        for name, values in snapshot.items()
+    }
+
+
+def increment(name, amount=1, **labels):
+    with _lock:
+        _counters[(name, tuple(sorted(labels.items())))] += amount
+
+
+def counters():
+    with _lock:
+        return {(name, labels): value for (name, labels), value in _counters.items()}
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(pairs):
+    return ",".join(f'{key}="{_escape(value)}"' for key, value in pairs)
+
+
+def render_prometheus():
+    with _lock:
+        histograms = {name: (list(h[0]), h[1], h[2]) for name, h in _histograms.items()}
+        counter_values = dict(_counters)
+    lines = [
+        f"# HELP {PREFIX}_latencia_segundos Duração de cada etapa da verificação.",
+        f"# TYPE {PREFIX}_latencia_segundos histogram",
+    ]
+    for name, (counts, total, count) in sorted(histograms.items()):
+        cumulative = 0
+        for bound, bucket_count in zip(BUCKETS, counts):
+            cumulative += bucket_count
+            lines.append(f'{PREFIX}_latencia_segundos_bucket{{etapa="{name}",le="{bound}"}} {cumulative}')
+        lines.append(f'{PREFIX}_latencia_segundos_bucket{{etapa="{name}",le="+Inf"}} {count}')
+        lines.append(f'{PREFIX}_latencia_segundos_sum{{etapa="{name}"}} {total}')
+        lines.append(f'{PREFIX}_latencia_segundos_count{{etapa="{name}"}} {count}')
+    by_name = defaultdict(list)
+    for (name, labels), value in counter_values.items():
+        by_name[name].append((labels, value))
+    for name, series in sorted(by_name.items()):
+        lines.append(f"# TYPE {PREFIX}_{name}_total counter")
+        for labels, value in sorted(series):
+            label_text = f"{{{_labels(labels)}}}" if labels else ""
+            lines.append(f"{PREFIX}_{name}_total{label_text} {int(value) if value.is_integer() else value}")
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_http_server(port, addr="127.0.0.1"):
+    """Serve `/metrics` no formato de texto do Prometheus numa thread de fundo."""
+    server = ThreadingHTTPServer((addr, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True, name="metricas").start()
+    return server
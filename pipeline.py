@@ -0,0 +1,90 @@
+"""Preparação concorrente das entradas e limite de chamadas simultâneas ao modelo, por processo."""
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from metrics import record_latency, span
+
+DEFAULT_MAX_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+DEFAULT_MAX_MODEL_CALLS = 16
+# Compactação das imagens (ver `media`); definidas aqui para que ler a configuração não carregue o PIL
+DEFAULT_MAX_EDGE = 1600
+DEFAULT_QUALITY = 80
+
+logger = logging.getLogger(__name__)
+_executor = None
+_executor_lock = threading.Lock()
+_max_workers = DEFAULT_MAX_WORKERS
+_model_slots = threading.BoundedSemaphore(DEFAULT_MAX_MODEL_CALLS)
+
+
+def configure(max_workers=DEFAULT_MAX_WORKERS, max_model_calls=DEFAULT_MAX_MODEL_CALLS):
+    # Deve ser chamado uma vez no arranque, antes de qualquer tarefa ser submetida
+    global _max_workers, _model_slots
+    _max_workers = max_workers
+    _model_slots = threading.BoundedSemaphore(max_model_calls)
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=_max_workers, thread_name_prefix="verificador")
+        return _executor
+
+
+@contextmanager
+def model_slot():
+    # Numa rajada de utilizadores, as chamadas excedentes esperam aqui em vez de ocupar mais ligações
+    started = time.perf_counter()
+    with _model_slots:
+        record_latency("espera_modelo", time.perf_counter() - started)
+        yield
+
+
+def prepare_image(data, max_edge=DEFAULT_MAX_EDGE, quality=DEFAULT_QUALITY):
+    from media import compact_image  # importação lenta (PIL), adiada até à primeira imagem
+    image = compact_image(data, max_edge, quality)
+    return {"mime_type": image.mime_type, "data": image.data}
+
+
+def upload_audio(data, upload):
+    from media import compact_audio  # importação lenta (PIL e pydub), adiada até ao primeiro áudio
+    audio = compact_audio(data)
+    with span("upload_audio"):
+        return upload(audio.data, audio.mime_type)
+
+
+def prepare_prompt_parts(text=None, image_bytes=None, audio_bytes=None, context=None,
+                         max_edge=DEFAULT_MAX_EDGE, quality=DEFAULT_QUALITY, upload=None):
+    """Compacta a imagem e compacta/envia o áudio em paralelo; devolve as partes na ordem do prompt.
+
+    `upload(data, mime_type)` envia o áudio ao serviço do modelo e devolve a referência a incluir no prompt;
+    deve passar pelo agendador (ex.: `agents.upload_media`), que ocupa a vaga de chamada ao modelo.
+    """
+    started = time.perf_counter()
+    executor = get_executor()
+    image_future = executor.submit(prepare_image, image_bytes, max_edge, quality) if image_bytes else None
+    audio_future = executor.submit(upload_audio, audio_bytes, upload) if audio_bytes else None
+    parts = [text] if text else []
+    if image_future:
+        parts.append(image_future.result())
+    if audio_future:
+        parts.append(audio_future.result())
+    if context:
+        parts.append(context)
+    record_latency("preparacao_entradas", time.perf_counter() - started)
+    return parts
+
+
+def run_in_background(fn, *args, **kwargs):
+    # Trabalho que não afeta a resposta ao utilizador (ex.: gravar no cache) sai do caminho crítico
+    def guarded():
+        try:
+            fn(*args, **kwargs)
+        except Exception:
+            logger.exception("Falha em tarefa de fundo %s", getattr(fn, "__name__", fn))
+    return get_executor().submit(guarded)
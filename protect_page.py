@@ -0,0 +1,114 @@
+"""Página do guia de segurança, carregada só quando o utilizador a abre."""
+import functools
+
+import streamlit as st
+
+from agents import gerar_relato_golpe
+from ui import get_pdf
+
+# Especificação Vega-Lite fixa: o gráfico não depende de dados da sessão, por isso não passa por DataFrame
+GROWTH_CHART = {
+    "data": {"values": [{"Ano": "2017", "Índice de Golpes": 100}, {"Ano": "2024", "Índice de Golpes": 460}]},
+    "mark": "bar",
+    "height": 250,
+    "encoding": {
+        "x": {"field": "Ano", "type": "nominal"},
+        "y": {"field": "Índice de Golpes", "type": "quantitative"},
+        "color": {"field": "Ano", "type": "nominal", "scale": {"range": ["#A5B4FC", "#4F46E5"]}, "legend": None},
+    },
+}
+
+# --- FUNÇÕES DO GUIA DE SEGURANÇA (PROTECT) ---
+def gerar_senha(frase):
+    if len(frase) < 10: return "Erro: Use uma frase mais longa."
+    password = ''.join([word[0].upper() if i % 2 == 0 else word[0].lower() for i, word in enumerate(frase.split()) if word])
+    password = password.replace('a', '@').replace('e', '3').replace('i', '!').replace('o', '0')
+    numbers = ''.join(filter(str.isdigit, frase))
+    return f"{password}_{numbers}" if numbers else f"{password}_25!"
+
+def show_protect_page():
+    if st.button("⬅️ Voltar ao Verificador"):
+        st.session_state.current_page = "verifier"
+        st.rerun()
+    st.title("🛡️ Seu Escudo Digital")
+    st.markdown("---")
+    with st.container(border=True):
+        st.header("O Campo de Batalha Digital")
+        col1, col2 = st.columns([1, 2])
+        with col1:
+            st.vega_lite_chart(GROWTH_CHART, use_container_width=True)
+        with col2:
+            st.write("""
+            **O número de golpes e estelionatos digitais cresceu 360% em 7 anos no Brasil.**
+            Este gráfico ilustra o crescimento alarmante, usando 2017 como base (índice 100). 
+            A principal arma dos golpistas é a **engenharia social**: a arte de manipular pessoas para que elas mesmas forneçam suas informações ou seu dinheiro. Eles criam um senso de urgência, medo ou oportunidade para fazer você agir sem pensar.
+            """)
+
+    with st.container(border=True):
+        st.header("Conheça as Armadilhas")
+        golpes = {
+            "🎣 Phishing e Smishing": "O golpista envia e-mails (Phishing) ou SMS (Smishing) fingindo ser uma empresa conhecida (banco, loja, etc.). A mensagem geralmente contém um link que leva a um site falso, idêntico ao original, para roubar sua senha e dados. **Sinais de alerta:** senso de urgência ('sua conta será bloqueada'), erros de português e links que parecem estranhos.",
+            "📱 Golpe do WhatsApp Clonado": "Criminosos conseguem o código de verificação do seu WhatsApp e ativam sua conta em outro aparelho. A partir daí, eles se passam por você para pedir dinheiro emprestado aos seus contatos. **Regra de Ouro:** Ative a 'Confirmação em duas etapas' nas configurações do WhatsApp e nunca compartilhe seu código de 6 dígitos.",
+            "🛒 Lojas e Ofertas Fantasma": "Sites ou perfis em redes sociais anunciam produtos populares (celulares, eletrônicos) por preços muito abaixo do mercado. Após o pagamento (geralmente via Pix), o produto nunca é enviado e o site desaparece. **Sinais de alerta:** preços bons demais para ser verdade, site com aparência amadora e aceita apenas Pix ou boleto.",
+            "💰 Falsos Investimentos e Pirâmides": "Um 'consultor' entra em contato prometendo lucros altíssimos, rápidos e sem risco, geralmente com criptomoedas ou ações. No início, eles podem até pagar pequenos valores para ganhar sua confiança, mas o objetivo é fazer você investir uma grande quantia que nunca mais verá. **Sinais de alerta:** promessas de lucro garantido e pressão para decidir rápido.",
+            "🤖 Golpes com IA (Deepfake)": "A tecnologia de Inteligência Artificial é usada para criar vídeos ou áudios falsos (deepfakes) de pessoas conhecidas. Um golpista pode usar um áudio clonado da sua voz para ligar para um familiar e pedir dinheiro numa emergência. **Defesa:** Crie uma 'palavra de segurança' com familiares e amigos próximos para confirmar a identidade em situações suspeitas."
+        }
+        for titulo, descricao in golpes.items():
+            with st.expander(titulo): st.write(descricao)
+            
+    with st.container(border=True):
+        st.header("Construa sua Fortaleza Digital")
+        show_password_generator()
+        st.subheader("2. Ative a Autenticação de Dois Fatores (2FA)")
+        st.write("A 2FA é uma tranca extra...")
+        show_buyer_checklist()
+
+    with st.container(border=True):
+        st.header("🆘 Fui Vítima de um Golpe!")
+        st.write("Descobrir um golpe é assustador, mas agir rápido pode fazer toda a diferença...")
+        st.subheader("Plano de Ação Imediato")
+        st.markdown("""
+        - **Passo 1: Contate o Banco:** ...
+        - **Passo 2: Altere Suas Senhas:** ...
+        - **Passo 3: Faça um Boletim de Ocorrência (B.O.):** ...
+        - **Passo 4: Tente Recuperar o Dinheiro (MED do Pix):** ...
+        """)
+        show_report_assistant()
+
+# Widgets do guia isolados em fragmentos: interagir com um não reexecuta a página inteira
+@st.fragment
+def show_password_generator():
+    st.subheader("1. Crie Senhas Fortes e Únicas")
+    frase = st.text_input("Digite uma frase para gerar uma senha:", placeholder="Ex: Meu cachorro Bob nasceu em 2015!")
+    if st.button("Gerar Senha"):
+        senha_gerada = gerar_senha(frase)
+        if "Erro" in senha_gerada: st.error(senha_gerada)
+        else: st.success(f"Senha gerada: `{senha_gerada}`")
+
+@st.fragment
+def show_buyer_checklist():
+    st.subheader("3. Checklist do Comprador Seguro")
+    st.checkbox("O site começa com https:// e tem um cadeado? 🔒")
+    st.checkbox("Os preços não são bons demais para ser verdade?")
+    st.checkbox("O site tem informações claras como CNPJ e endereço?")
+    st.checkbox("A reputação no Reclame Aqui é boa?")
+    st.checkbox("A loja oferece pagamentos seguros como cartão de crédito?")
+
+@st.fragment
+def show_report_assistant():
+    st.subheader("✨ Assistente para Relato de Golpe")
+    st.write("Preencha os detalhes abaixo e nossa IA criará um texto formal...")
+    tipo_golpe = st.text_input("Qual foi o tipo de golpe?", key="tipo_golpe")
+    prejuizo = st.text_input("O que você perdeu?", key="prejuizo")
+    descricao = st.text_area("Descreva brevemente como o golpe aconteceu:", key="descricao_golpe")
+    if st.button("Gerar Relato"):
+        if all([tipo_golpe, prejuizo, descricao]):
+            with st.spinner("Gerando relato..."):
+                relato_gerado = gerar_relato_golpe(tipo_golpe, prejuizo, descricao)
+                st.text_area("Relato Gerado:", value=relato_gerado, height=300)
+                # ATUALIZAÇÃO: Botão de download para o relato
+                pdf_bytes = functools.partial(get_pdf, "Relato de Ocorrência", relato_gerado)
+                st.download_button("Baixar Relato em PDF", pdf_bytes, "relato_golpe.pdf", "application/pdf", on_click="ignore")
+        else:
+            st.warning("Preencha todos os campos.")
+
@@ -0,0 +1,29 @@
+"""Interpretação da resposta do Validador e geração dos relatórios em PDF (sem dependência do Streamlit)."""
+import re
+
+from metrics import span
+
+
+def parse_sections(response):
+    return {s[0].strip(): s[1].strip() for s in re.findall(r'###\s*(.*?)\n(.*?)(?=###|$)', response, re.S)}
+
+
+def recommendation_items(section):
+    # Remove a numeração e a ênfase markdown de cada linha de recomendação
+    items = (re.sub(r'^\d+\.\s*|\*|\*\*', '', rec).strip() for rec in section.split('\n'))
+    return [item for item in items if item]
+
+
+def generate_pdf(title, content):
+    from fpdf import FPDF, XPos, YPos  # importação lenta, adiada até ao primeiro relatório
+    with span("pdf"):
+        pdf = FPDF()
+        pdf.add_page()
+        pdf.set_font("Helvetica", "B", 16)
+        pdf.cell(0, 10, title, new_x=XPos.LMARGIN, new_y=YPos.NEXT, align="C")
+        pdf.ln(10)
+        pdf.set_font("Helvetica", "", 12)
+        # Limpa o texto de markdown e codifica para latin-1 para o PDF
+        cleaned_content = re.sub(r'###\s*|\*\*|\*', '', content).encode('latin-1', 'replace').decode('latin-1')
+        pdf.multi_cell(0, 10, cleaned_content)
+        return bytes(pdf.output())
@@ -0,0 +1,262 @@
+"""Agendamento das chamadas ao modelo partilhado por todas as sessões.
+
+- pedidos idênticos em curso no processo são agrupados (`SingleFlight`): só um chega ao modelo e todos recebem o resultado;
+- a cota do serviço é respeitada por um balde de fichas (`TokenBucket`) num ficheiro SQLite de `.cache`, partilhado
+  pelas réplicas da aplicação e por `batch.py`, com prioridade para a interface sobre o lote;
+- erros transitórios (429 e 5xx) são repetidos com espera exponencial aleatória.
+"""
+import contextvars
+import os
+import random
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from metrics import increment, record_latency
+from pipeline import model_slot
+from storage import open_db, transaction
+
+# Prioridades: menor número é servido primeiro quando falta cota
+INTERACTIVE, BATCH = 0, 1
+PRIORITY_NAMES = ("interativo", "lote")
+
+RETRYABLE_CODES = frozenset({429, 500, 502, 503, 504})
+DEFAULT_ATTEMPTS = 4
+DEFAULT_BACKOFF = 1.0  # segundos antes da primeira repetição (em média metade, pela aleatoriedade)
+DEFAULT_MAX_BACKOFF = 20.0
+DEFAULT_QUOTA_PATH = os.path.join(".cache", "cota.sqlite3")
+POLL_INTERVAL = 0.05  # segundos entre tentativas de um pedido à espera de ficha
+WAITER_TTL = 5.0  # um pedido em espera sem sinal de vida há mais tempo (processo terminado) deixa de contar
+
+_priority = contextvars.ContextVar("prioridade", default=INTERACTIVE)
+
+
+@contextmanager
+def priority(level):
+    """Define a prioridade das chamadas ao modelo feitas nesta thread (ex.: `BATCH` na verificação em lote)."""
+    token = _priority.set(level)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def is_retryable(error):
+    # As exceções de google.api_core trazem o estado HTTP em `code` (ResourceExhausted = 429, ServiceUnavailable = 503...)
+    return getattr(error, "code", None) in RETRYABLE_CODES
+
+
+class TokenBucket:
+    """Limita as chamadas a `rate` por segundo, com rajadas até `capacity`; `rate` 0 desativa o limite.
+
+    As fichas e os pedidos em espera ficam em SQLite, para que todos os processos que partilham `path` (réplicas
+    da aplicação e `batch.py`) gastem a mesma cota. Enquanto houver um pedido de prioridade mais alta à espera,
+    em qualquer processo, os de prioridade mais baixa não levam fichas. Todos devem usar o mesmo `rate`.
+    """
+
+    def __init__(self, rate, capacity=None, path=DEFAULT_QUOTA_PATH):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self._lock = threading.Lock()
+        self._conn = None
+        if not rate:
+            return
+        self._conn = open_db(path)
+        self._conn.execute("""CREATE TABLE IF NOT EXISTS bucket (
+            id INTEGER PRIMARY KEY CHECK (id = 0), tokens REAL NOT NULL, updated REAL NOT NULL)""")
+        self._conn.execute("""CREATE TABLE IF NOT EXISTS waiting (
+            id TEXT PRIMARY KEY, level INTEGER NOT NULL, seen REAL NOT NULL) WITHOUT ROWID""")
+        self._conn.execute("INSERT OR IGNORE INTO bucket VALUES (0, ?, ?)", (self.capacity, time.time()))
+
+    def _take(self, waiter, level):
+        # Devolve None se levou uma ficha, senão os segundos até tentar de novo
+        now = time.time()  # relógio comum a todos os processos
+        # IMMEDIATE: a leitura e a escrita das fichas não se intercalam com as de outro processo
+        with self._lock, transaction(self._conn, "IMMEDIATE"):
+            self._conn.execute("INSERT OR REPLACE INTO waiting VALUES (?, ?, ?)", (waiter, level, now))
+            self._conn.execute("DELETE FROM waiting WHERE seen < ?", (now - WAITER_TTL,))
+            ahead = self._conn.execute("SELECT 1 FROM waiting WHERE level < ? LIMIT 1", (level,)).fetchone()
+            tokens, updated = self._conn.execute("SELECT tokens, updated FROM bucket WHERE id = 0").fetchone()
+            tokens = min(self.capacity, tokens + max(0.0, now - updated) * self.rate)
+            taken = tokens >= 1 and not ahead
+            if taken:
+                self._conn.execute("DELETE FROM waiting WHERE id = ?", (waiter,))
+            self._conn.execute("UPDATE bucket SET tokens = ?, updated = ? WHERE id = 0", (tokens - taken, now))
+        if taken:
+            return None
+        return min(POLL_INTERVAL, max((1 - tokens) / self.rate, 0.005))
+
+    def acquire(self, level=INTERACTIVE):
+        """Bloqueia até haver uma ficha para esta prioridade; devolve os segundos de espera."""
+        if not self.rate:
+            return 0.0
+        started = time.monotonic()
+        waiter = uuid.uuid4().hex
+        try:
+            while True:
+                delay = self._take(waiter, level)
+                if delay is None:
+                    return time.monotonic() - started
+                time.sleep(delay)
+        except BaseException:
+            with self._lock:
+                self._conn.execute("DELETE FROM waiting WHERE id = ?", (waiter,))
+            raise
+
+
+class Abandoned(Exception):
+    """O líder de um `SingleFlight` parou antes de terminar; quem esperava repete a chamada."""
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+    def wait(self):
+        self.done.wait()
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+class SingleFlight:
+    """Agrupa chamadas concorrentes com a mesma chave: a primeira executa, as restantes esperam o seu resultado."""
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def _join(self, key):
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                return call, False
+            call = self._calls[key] = _Call()
+            return call, True
+
+    def _leave(self, key, call):
+        with self._lock:
+            self._calls.pop(key, None)
+        call.done.set()
+
+    def _finish(self, key, call, completed):
+        if not completed and call.error is None:
+            # O líder desistiu a meio (ex.: rerun ou sessão fechada): um resultado parcial nunca é partilhado
+            call.error = Abandoned()
+        self._leave(key, call)
+
+    def _follow(self, key):
+        # Devolve (call, True) para quem deve executar; quem espera por um líder que desistiu volta a tentar
+        while True:
+            call, leader = self._join(key)
+            if leader:
+                return call, True
+            increment("pedidos_agrupados")
+            try:
+                call.wait()
+            except Abandoned:
+                continue
+            return call, False
+
+    def do(self, key, fn, *args, **kwargs):
+        call, leader = self._follow(key)
+        if not leader:
+            return call.wait()
+        completed = False
+        try:
+            call.result = fn(*args, **kwargs)
+            completed = True
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            self._finish(key, call, completed)
+
+    def stream(self, key, fn, combine, *args, **kwargs):
+        """Como `do`, para geradores: quem espera recebe o resultado completo, `combine(pedaços)`, num só pedaço."""
+        call, leader = self._follow(key)
+        if not leader:
+            yield call.wait()
+            return
+        chunks = []
+        completed = False
+        try:
+            for chunk in fn(*args, **kwargs):
+                chunks.append(chunk)
+                yield chunk
+            call.result = combine(chunks)
+            completed = True
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            self._finish(key, call, completed)
+
+
+class Scheduler:
+    """Admissão das chamadas ao modelo: cota (com prioridade), limite de chamadas simultâneas e repetições."""
+
+    def __init__(self, rate=0.0, burst=None, attempts=DEFAULT_ATTEMPTS,
+                 backoff=DEFAULT_BACKOFF, max_backoff=DEFAULT_MAX_BACKOFF, quota_path=DEFAULT_QUOTA_PATH):
+        self.bucket = TokenBucket(rate, burst, quota_path)
+        self.attempts = attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+    @contextmanager
+    def _admit(self):
+        level = _priority.get()
+        waited = self.bucket.acquire(level)
+        if self.bucket.rate:
+            record_latency(f"espera_cota_{PRIORITY_NAMES[level]}", waited)
+        with model_slot():
+            yield
+
+    def _pause(self, agent, attempt, error):
+        # Espera exponencial com aleatoriedade total, para as sessões não repetirem todas ao mesmo tempo
+        delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+        increment("novas_tentativas", agente=agent, codigo=getattr(error, "code", ""))
+        time.sleep(delay)
+
+    def call(self, agent, fn, *args, **kwargs):
+        for attempt in range(self.attempts):
+            try:
+                with self._admit():
+                    return fn(*args, **kwargs)
+            except Exception as e:
+                if not is_retryable(e) or attempt == self.attempts - 1:
+                    raise
+                self._pause(agent, attempt, e)
+
+    def stream(self, agent, fn, *args, **kwargs):
+        # Só repete enquanto nada foi entregue; a partir do primeiro pedaço o erro é propagado
+        for attempt in range(self.attempts):
+            started = False
+            try:
+                with self._admit():
+                    for chunk in fn(*args, **kwargs):
+                        started = True
+                        yield chunk
+                return
+            except Exception as e:
+                if started or not is_retryable(e) or attempt == self.attempts - 1:
+                    raise
+                self._pause(agent, attempt, e)
+
+
+_scheduler = Scheduler()
+
+
+def configure(rate_per_minute=0, burst=None, attempts=DEFAULT_ATTEMPTS, quota_path=DEFAULT_QUOTA_PATH):
+    # Deve ser chamado uma vez no arranque; `rate_per_minute` é a cota do projeto no Gemini, igual em todos os processos
+    global _scheduler
+    _scheduler = Scheduler(rate_per_minute / 60.0, burst, attempts, quota_path=quota_path)
+    return _scheduler
+
+
+def get_scheduler():
+    return _scheduler
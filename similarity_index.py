@@ -0,0 +1,176 @@
+"""Índice de quase-duplicados (MinHash + LSH) sobre textos já analisados."""
+import hashlib
+import os
+import re
+import threading
+from array import array
+
+from storage import open_db, transaction
+from verdict_cache import normalize_text
+
+DEFAULT_PATH = os.path.join(".cache", "similares.sqlite3")
+DEFAULT_THRESHOLD = 0.75
+NUM_PERM = 128
+MIN_RECALL = 0.9  # probabilidade mínima de um par no limiar de similaridade cair num balde comum
+LEGACY_LSH = (8, 16)  # (linhas, bandas) dos índices gravados antes de a divisão depender do limiar
+SHINGLE_SIZE = 5
+MIN_WORDS = 6  # textos muito curtos produzem falsos positivos
+MAX_CANDIDATES_PER_BAND = 200
+
+_MERSENNE = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_PERMS = [
+    (int.from_bytes(hashlib.blake2b(b"a%d" % i, digest_size=8).digest(), "big") % (_MERSENNE - 1) + 1,
+     int.from_bytes(hashlib.blake2b(b"b%d" % i, digest_size=8).digest(), "big") % _MERSENNE)
+    for i in range(NUM_PERM)
+]
+_URL_RE = re.compile(r"(?:https?://|www\.)\S+|\b[\w-]+\.(?:ly|me|io|co|cc|gl|tk|xyz|com(?:\.br)?)/\S*")
+_NUMBER_RE = re.compile(r"\d+(?:[.,]\d+)*")
+
+
+def canonicalize(text):
+    # Links encurtados, valores e números variam de vítima para vítima; o resto da campanha não
+    text = _URL_RE.sub(" <url> ", normalize_text(text))
+    return re.sub(r"\s+", " ", _NUMBER_RE.sub("<n>", text)).strip()
+
+
+def shingles(text):
+    text = canonicalize(text)
+    if len(text.split()) < MIN_WORDS:
+        return set()
+    return {text[i:i + SHINGLE_SIZE] for i in range(max(1, len(text) - SHINGLE_SIZE + 1))}
+
+
+def minhash(shingle_set):
+    hashes = [int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest(), "big") for s in shingle_set]
+    return [min(((a * h + b) % _MERSENNE) & _MAX_HASH for h in hashes) for a, b in _PERMS]
+
+
+def estimate_similarity(sig_a, sig_b):
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / len(sig_a)
+
+
+def lsh_params(threshold, num_perm=NUM_PERM, recall=MIN_RECALL):
+    """Devolve `(linhas, bandas)` com o maior número de linhas por banda que ainda encontra `recall` dos pares no limiar.
+
+    Mais linhas por banda dão menos candidatos falsos; menos linhas deixam limiares baixos serem encontrados
+    (com 8x16 fixos, um par com 0.5 de similaridade só era candidato ~6% das vezes).
+    """
+    if not 0 < threshold <= 1:
+        raise ValueError(f"Limiar de similaridade inválido: {threshold}")
+    best = (1, num_perm)
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        if 1 - (1 - threshold ** rows) ** bands >= recall:
+            best = (rows, bands)
+    return best
+
+
+def _band_buckets(signature, rows, bands):
+    for band in range(bands):
+        chunk = array("Q", signature[band * rows:(band + 1) * rows]).tobytes()
+        yield band, int.from_bytes(hashlib.blake2b(chunk, digest_size=8).digest(), "big", signed=True)
+
+
+class SimilarityIndex:
+    """Associa textos analisados à chave do veredicto no `VerdictCache`.
+
+    A pesquisa só consulta os baldes LSH da assinatura, portanto não cresce linearmente com o corpus.
+    A divisão em bandas segue o limiar (`lsh_params`) e fica gravada no ficheiro; se o limiar mudar, os baldes são
+    reconstruídos a partir das assinaturas guardadas. Os processos que partilham o ficheiro devem usar o mesmo limiar.
+    """
+
+    def __init__(self, path=DEFAULT_PATH, threshold=DEFAULT_THRESHOLD):
+        self.threshold = threshold
+        self.rows, self.bands = lsh_params(threshold)
+        self._lock = threading.Lock()
+        self._conn = open_db(path)
+        self._conn.execute("""CREATE TABLE IF NOT EXISTS messages (
+            id INTEGER PRIMARY KEY, verdict_key TEXT UNIQUE NOT NULL, signature BLOB NOT NULL)""")
+        self._conn.execute("""CREATE TABLE IF NOT EXISTS buckets (
+            band INTEGER NOT NULL, bucket INTEGER NOT NULL, message_id INTEGER NOT NULL,
+            PRIMARY KEY (band, bucket, message_id)) WITHOUT ROWID""")
+        self._conn.execute("""CREATE TABLE IF NOT EXISTS lsh (
+            id INTEGER PRIMARY KEY CHECK (id = 0), band_rows INTEGER NOT NULL, bands INTEGER NOT NULL)""")
+        self._ensure_bands()
+
+    def _ensure_bands(self):
+        with self._lock, transaction(self._conn, "IMMEDIATE"):
+            row = self._conn.execute("SELECT band_rows, bands FROM lsh WHERE id = 0").fetchone()
+            if row is None and self._conn.execute("SELECT 1 FROM messages LIMIT 1").fetchone():
+                row = LEGACY_LSH
+            if row is not None and tuple(row) != (self.rows, self.bands):
+                self._conn.execute("DELETE FROM buckets")
+                for message_id, blob in self._conn.execute("SELECT id, signature FROM messages").fetchall():
+                    self._conn.executemany(
+                        "INSERT OR IGNORE INTO buckets (band, bucket, message_id) VALUES (?, ?, ?)",
+                        [(band, bucket, message_id) for band, bucket in self._buckets(array("Q", blob))],
+                    )
+            self._conn.execute("INSERT OR REPLACE INTO lsh VALUES (0, ?, ?)", (self.rows, self.bands))
+
+    def _buckets(self, signature):
+        return _band_buckets(signature, self.rows, self.bands)
+
+    def add(self, text, verdict_key):
+        shingle_set = shingles(text)
+        if not shingle_set:
+            return False
+        signature = minhash(shingle_set)
+        with self._lock, transaction(self._conn):
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO messages (verdict_key, signature) VALUES (?, ?)",
+                (verdict_key, array("Q", signature).tobytes()),
+            )
+            if cursor.rowcount:
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO buckets (band, bucket, message_id) VALUES (?, ?, ?)",
+                    [(band, bucket, cursor.lastrowid) for band, bucket in self._buckets(signature)],
+                )
+        return True
+
+    def remove(self, verdict_keys):
+        """Apaga as mensagens destes veredictos (ex.: despejados do `VerdictCache`); devolve quantas existiam."""
+        removed = 0
+        with self._lock, transaction(self._conn):
+            for verdict_key in verdict_keys:
+                row = self._conn.execute(
+                    "SELECT id, signature FROM messages WHERE verdict_key = ?", (verdict_key,)
+                ).fetchone()
+                if row is None:
+                    continue
+                # Os baldes são recalculados da assinatura, para apagar pela chave primária sem varrer a tabela
+                self._conn.executemany(
+                    "DELETE FROM buckets WHERE band = ? AND bucket = ? AND message_id = ?",
+                    [(band, bucket, row[0]) for band, bucket in self._buckets(array("Q", row[1]))],
+                )
+                self._conn.execute("DELETE FROM messages WHERE id = ?", (row[0],))
+                removed += 1
+        return removed
+
+    def query(self, text, threshold=None):
+        """Devolve `[(verdict_key, score), ...]` das mensagens acima do limiar, da mais parecida à menos parecida."""
+        threshold = self.threshold if threshold is None else threshold
+        shingle_set = shingles(text)
+        if not shingle_set:
+            return []
+        signature = minhash(shingle_set)
+        candidates = set()
+        with self._lock:
+            for band, bucket in self._buckets(signature):
+                rows = self._conn.execute(
+                    "SELECT message_id FROM buckets WHERE band = ? AND bucket = ? LIMIT ?",
+                    (band, bucket, MAX_CANDIDATES_PER_BAND),
+                ).fetchall()
+                candidates.update(row[0] for row in rows)
+            matches = []
+            for message_id in candidates:
+                row = self._conn.execute(
+                    "SELECT verdict_key, signature FROM messages WHERE id = ?", (message_id,)
+                ).fetchone()
+                if row is None:
+                    continue  # balde órfão (mensagem apagada por um processo com outra divisão em bandas)
+                verdict_key, blob = row
+                score = estimate_similarity(signature, array("Q", blob))
+                if score >= threshold:
+                    matches.append((verdict_key, score))
+        return sorted(matches, key=lambda match: match[1], reverse=True)
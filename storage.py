@@ -0,0 +1,31 @@
+"""Ligações SQLite partilhadas pelos ficheiros de `.cache` (veredictos, semelhantes, indicadores)."""
+import os
+import sqlite3
+from contextlib import contextmanager
+
+
+def open_db(path):
+    """Abre `path` (criando a pasta) em modo WAL, com autocommit e partilhável entre threads.
+
+    As escritas com várias instruções usam `transaction`; o acesso concorrente é serializado por quem chama.
+    """
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+    # WAL: leitores de outros processos não bloqueiam as escritas; NORMAL só sincroniza o disco nos checkpoints
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+@contextmanager
+def transaction(conn, mode=""):
+    # `mode` "IMMEDIATE" reserva a escrita logo no início: uma leitura seguida de escrita não falha com
+    # SQLITE_BUSY quando outro processo escreve entretanto
+    conn.execute(f"BEGIN {mode}")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
@@ -0,0 +1,76 @@
+import agents
+import metrics
+from agents import VALIDATOR_BLOCKED, stream_validator_agent
+
+ANALYSIS = {"analise": "Link encurtado e ameaça de bloqueio.", "risco": "Alto", "fontes": []}
+
+
+class Chunk:
+    usage_metadata = None
+
+    def __init__(self, text):
+        self.text = text
+        self.parts = [text]
+
+
+class StreamingModel:
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    def generate_content(self, prompt, stream=False):
+        return iter(self.chunks)
+
+
+class Backend:
+    def __init__(self, chunks):
+        self.model = StreamingModel(chunks)
+
+    def get(self, kind):
+        return self.model
+
+
+def _responses(result):
+    return metrics.counters().get(("respostas_modelo", (("agente", "validador"), ("resultado", result))), 0)
+
+
+def test_an_empty_stream_is_reported_as_blocked(monkeypatch):
+    monkeypatch.setattr(agents, "_registry", Backend([]))
+    before = _responses("vazia")
+    assert list(stream_validator_agent(dict(ANALYSIS, analise="sem pedaços"))) == [VALIDATOR_BLOCKED]
+    assert _responses("vazia") == before + 1
+
+
+def test_the_last_chunk_is_recorded(monkeypatch):
+    monkeypatch.setattr(agents, "_registry", Backend([Chunk("### Análise Detalhada\n"), Chunk("Golpe.")]))
+    before = _responses("ok")
+    assert "".join(stream_validator_agent(ANALYSIS)) == "### Análise Detalhada\nGolpe."
+    assert _responses("ok") == before + 1
+
+
+def test_each_model_is_built_once_under_concurrency(monkeypatch):
+    import threading
+    import time
+
+    registry = agents.ModelRegistry()
+    builds = []
+
+    def build(kind):
+        builds.append(kind)
+        time.sleep(0.01)
+        return object()
+
+    monkeypatch.setattr(registry, "_build", build)
+    start = threading.Barrier(8)
+    models = []
+
+    def get():
+        start.wait()
+        models.append(registry.get("texto"))
+
+    threads = [threading.Thread(target=get) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert builds == ["texto"]
+    assert len({id(model) for model in models}) == 1
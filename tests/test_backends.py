@@ -0,0 +1,21 @@
+import json
+
+import pytest
+
+from backends import FakeBackend, ModelBackend
+
+
+def test_model_backend_is_abstract():
+    class Partial(ModelBackend):
+        def get(self, kind):
+            return None
+
+    with pytest.raises(TypeError):
+        Partial()
+
+
+def test_fake_analyses_differ_per_input():
+    # Análises iguais dariam o mesmo prompt ao Validador, e as sessões do benchmark seriam agrupadas
+    model = FakeBackend().get("json")
+    analyses = {json.loads(model.generate_content(["Analise", f"mensagem {i}"]).text)["analise"] for i in range(20)}
+    assert len(analyses) == 20
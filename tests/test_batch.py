@@ -0,0 +1,57 @@
+import json
+
+from agents import VALIDATOR_BLOCKED, VALIDATOR_ERROR
+from batch import completed_ids, run_batch
+from verifier import Verification
+
+ANALYSIS = {"analise": "Pedido de pagamento urgente.", "risco": "Alto", "fontes": []}
+
+
+class ScriptedVerifier:
+    """Devolve, por texto, a resposta final indicada; conta as verificações feitas."""
+
+    def __init__(self, responses):
+        self.responses = responses
+        self.calls = []
+
+    def verify(self, text=None, image_bytes=None, audio_bytes=None):
+        self.calls.append(text)
+        return Verification("k", dict(ANALYSIS), self.responses.get(text, "Golpe."), "modelo", None, True, 0.0)
+
+
+def _read(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_validator_failures_are_reported_as_errors_and_retried(tmp_path):
+    output = str(tmp_path / "resultados.jsonl")
+    records = [{"id": "1", "texto": "a"}, {"id": "2", "texto": "b"}, {"id": "3", "texto": "c"}]
+    verifier = ScriptedVerifier({"b": VALIDATOR_ERROR, "c": VALIDATOR_BLOCKED})
+    assert run_batch(records, output, verifier, concurrency=1) == 3
+    results = {r["id"]: r for r in _read(output)}
+    assert results["1"]["risco"] == "Alto" and "erro" not in results["1"]
+    assert results["2"] == {"id": "2", "erro": VALIDATOR_ERROR, "segundos": results["2"]["segundos"]}
+    assert results["3"]["erro"] == VALIDATOR_BLOCKED
+    assert completed_ids(output) == {"1"}
+
+    # Ao retomar, só os registos com erro são refeitos
+    verifier = ScriptedVerifier({})
+    assert run_batch(records, output, verifier, concurrency=1) == 2
+    assert sorted(verifier.calls) == ["b", "c"]
+    assert completed_ids(output) == {"1", "2", "3"}
+
+
+def test_resume_after_a_line_cut_inside_a_utf8_character(tmp_path):
+    output = tmp_path / "resultados.jsonl"
+    done = json.dumps({"id": "1", "risco": "Alto", "analise": "Cobrança"}, ensure_ascii=False)
+    cut = json.dumps({"id": "2", "risco": "Alto", "analise": "Ameaça"}, ensure_ascii=False).encode("utf-8")
+    output.write_bytes(done.encode("utf-8") + b"\n" + cut[:cut.index("ç".encode("utf-8")) + 1])
+    assert completed_ids(str(output)) == {"1"}
+
+    verifier = ScriptedVerifier({})
+    records = [{"id": "1", "texto": "a"}, {"id": "2", "texto": "b"}]
+    assert run_batch(records, str(output), verifier, concurrency=1) == 1
+    assert verifier.calls == ["b"]
+    assert completed_ids(str(output)) == {"1", "2"}
+    assert output.read_bytes().splitlines()[-1].startswith(b'{"id": "2"')
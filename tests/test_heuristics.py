@@ -0,0 +1,51 @@
+import pytest
+
+from heuristics import RuleEngine
+
+
+@pytest.fixture(scope="module")
+def engine():
+    return RuleEngine()
+
+
+def test_account_threat_with_a_short_link_is_resolved_locally(engine):
+    analysis = engine.classify("Sua conta será bloqueada. Acesse bit.ly/3xYz9")
+    assert analysis["risco"] == "Alto"
+    assert "Link encurtado" in analysis["analise"]
+
+
+@pytest.mark.parametrize("text", [
+    "Sua conta será bloqueada hoje",
+    "Confira as fotos da festa: bit.ly/fotos123",
+    "Reunião remarcada. Qualquer dúvida me liga no (11) 98765-4321.",
+])
+def test_single_signals_go_to_the_model(engine, text):
+    assert engine.classify(text) is None
+
+
+@pytest.mark.parametrize("text", [
+    "Renda extra! acesse bit.ly/abc123 e ganhe por curtir",
+    "Central de atendimento bit.ly/xyz999 clique",
+])
+def test_links_inside_a_rule_span_are_still_extracted(engine, text):
+    scan = engine.scan(text)
+    assert scan.domains == ["bit.ly"] and len(scan.urls) == 1
+    assert len(scan.signals) == 2 and "Link encurtado" in scan.signals
+
+
+def test_blocklisted_domains_inside_a_rule_span_are_flagged(tmp_path):
+    import json
+    from heuristics import DEFAULT_RULES_PATH
+    with open(DEFAULT_RULES_PATH, encoding="utf-8") as f:
+        rules = json.load(f)
+    rules["dominios_maliciosos"] = ["golpe.xyz"]
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps(rules), encoding="utf-8")
+    scan = RuleEngine(str(path)).scan("Trabalhe de casa, cadastro em app.golpe.xyz/vagas para avaliar produtos")
+    assert "Domínio conhecido por golpes" in scan.signals
+    assert "Oferta de renda extra por tarefas simples" in scan.signals
+
+
+def test_a_long_rule_does_not_hide_another_one(engine):
+    scan = engine.scan("Central de segurança: urgente, ligue 11 98765-4321 ou clique")
+    assert {"Falsa central de atendimento ou segurança", "Pressão de urgência"} <= set(scan.signals)
@@ -0,0 +1,46 @@
+import pytest
+
+from ioc_index import IndicatorIndex, is_flagged, normalize_indicator, valid_cnpj
+
+SCAM = "Sua conta será bloqueada! Regularize em https://bit.ly/abc123 ou ligue +55 11 98765-4321 (banco www.bb.com.br)"
+
+
+@pytest.fixture
+def index(tmp_path):
+    return IndicatorIndex(str(tmp_path / "indicadores.sqlite3"), bloom=False)
+
+
+def test_verdicts_only_teach_urls_phones_and_pix_keys(index):
+    index.record(SCAM, "Alto", ["https://www.gov.br/anatel/golpes"])
+    kinds = {kind for kind, _ in index.extract(SCAM)}
+    assert {"url", "telefone", "dominio"} <= kinds
+    known = {(i.kind, i.value) for i in index.lookup(index.extract(SCAM))}
+    assert known == {("url", "bit.ly/abc123"), ("telefone", "11987654321")}
+    assert {(i.kind, i.value) for i in index.lookup({("fonte", "gov.br")})} == {("fonte", "gov.br")}
+
+
+def test_shorteners_and_imitated_domains_are_not_flagged(index):
+    index.record(SCAM, "Alto")
+    harmless = "Visite bit.ly/zzz999 para ver as fotos do aniversário ou o site www.bb.com.br"
+    assert [i for i in index.lookup(index.extract(harmless)) if is_flagged(i)] == []
+
+
+def test_low_risk_verdicts_are_not_flagged_but_blocklists_are(index):
+    index.record("Ligue para 11 98765-4321 para confirmar a entrega", "Baixo")
+    assert [i for i in index.lookup({("telefone", "11987654321")}) if is_flagged(i)] == []
+    index.import_rows([("dominio", "https://www.entregas-correios.xyz/pagar")], "Médio", "lista:teste")
+    flagged = [i for i in index.lookup({("dominio", "entregas-correios.xyz")}) if is_flagged(i)]
+    assert [(i.value, i.origin) for i in flagged] == [("entregas-correios.xyz", "lista:teste")]
+
+
+def test_a_low_verdict_does_not_downgrade_a_blocklist_entry(index):
+    index.import_rows([("telefone", "+55 (11) 98765-4321")], "Alto", "lista:teste")
+    index.record("Ligue para 11 98765-4321", "Baixo")
+    (indicator,) = index.lookup({("telefone", "11987654321")})
+    assert (indicator.risk, indicator.origin, indicator.hits) == ("Alto", "lista:teste", 2)
+
+
+def test_normalization():
+    assert normalize_indicator("url", "HTTPS://www.Golpe.xyz/pix/") == "golpe.xyz/pix"
+    assert normalize_indicator("telefone", "+55 (11) 98765-4321") == "11987654321"
+    assert valid_cnpj("11222333000181") and not valid_cnpj("11222333000182")
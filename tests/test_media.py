@@ -0,0 +1,73 @@
+import io
+
+from PIL import Image
+
+import metrics
+from media import compact_image
+
+
+def _encode(image, fmt, **params):
+    output = io.BytesIO()
+    image.save(output, format=fmt, **params)
+    return output.getvalue()
+
+
+def test_transparent_areas_become_white():
+    image = Image.new("RGBA", (40, 40), (0, 0, 0, 0))
+    image.paste((200, 0, 0, 255), (10, 10, 30, 30))
+    compacted = compact_image(_encode(image, "PNG", compress_level=0))
+    assert compacted.mime_type == "image/jpeg"
+    result = Image.open(io.BytesIO(compacted.data)).convert("RGB")
+    assert min(result.getpixel((0, 0))) > 240
+    assert result.getpixel((20, 20))[0] > 150
+
+
+def test_small_originals_are_kept_when_the_jpeg_is_not_smaller():
+    data = _encode(Image.new("P", (16, 16)), "PNG")
+    compacted = compact_image(data)
+    assert (compacted.data, compacted.mime_type) == (data, "image/png")
+
+
+def test_metadata_is_always_stripped():
+    exif = Image.Exif()
+    exif[0x010F] = "Fabricante"  # Make
+    data = _encode(Image.new("RGB", (16, 16)), "JPEG", quality=10, exif=exif)
+    compacted = compact_image(data)
+    assert compacted.mime_type == "image/jpeg" and not Image.open(io.BytesIO(compacted.data)).getexif()
+
+
+def test_savings_are_reported_even_when_negative():
+    before = metrics.counters()
+    exif = Image.Exif()
+    exif[0x010F] = "Fabricante"
+    noise = Image.effect_noise((64, 64), 80).convert("RGB")
+    data = _encode(noise, "JPEG", quality=1, exif=exif)  # com metadados, tem de ser regravada
+    compacted = compact_image(data, quality=95)
+    after = metrics.counters()
+
+    def delta(name):
+        key = (name, (("tipo", "imagem"),))
+        return after.get(key, 0) - before.get(key, 0)
+    assert delta("bytes_originais") == len(data)
+    assert delta("bytes_enviados") == len(compacted.data) > len(data)
+
+
+def test_silence_detection_is_cheap(monkeypatch):
+    import time
+
+    import media
+    from pydub import AudioSegment
+    from pydub.generators import Sine
+
+    tone = Sine(440).to_audio_segment(duration=5000).set_frame_rate(16000).set_channels(1)
+    voice_note = sum([tone + AudioSegment.silent(2000, frame_rate=16000)] * 8, AudioSegment.silent(100, frame_rate=16000))
+
+    def fake_export(segment, out_f, **options):  # sem ffmpeg: só a deteção de silêncio é medida
+        out_f.write(b"OggS")
+    monkeypatch.setattr(AudioSegment, "from_file", classmethod(lambda cls, f: voice_note))
+    monkeypatch.setattr(AudioSegment, "export", fake_export)
+    started = time.process_time()
+    compacted = media.compact_audio(b"RIFF" + bytes(4) + b"WAVE" + bytes(1000))
+    assert compacted.mime_type == "audio/ogg"
+    # Quase um minuto de áudio: com seek_step de 1 ms seriam ~1,4 s de CPU
+    assert time.process_time() - started < 0.5
@@ -0,0 +1,40 @@
+import json
+import logging
+
+import metrics
+
+
+def _lines(prefix):
+    return [line for line in metrics.render_prometheus().splitlines() if line.startswith(prefix)]
+
+
+def test_histogram_buckets_are_cumulative():
+    for seconds in (0.003, 0.02, 0.02, 0.7, 120.0):
+        metrics.record_latency("teste_histograma", seconds)
+    buckets = _lines('verificador_latencia_segundos_bucket{etapa="teste_histograma"')
+    counts = [int(line.rsplit(" ", 1)[1]) for line in buckets]
+    assert counts == sorted(counts)
+    bounds = dict(zip([line.split('le="')[1].split('"')[0] for line in buckets], counts))
+    assert (bounds["0.005"], bounds["0.025"], bounds["1.0"], bounds["60.0"], bounds["+Inf"]) == (1, 3, 4, 4, 5)
+    (count,) = _lines('verificador_latencia_segundos_count{etapa="teste_histograma"}')
+    assert int(count.rsplit(" ", 1)[1]) == bounds["+Inf"] == 5
+    (total,) = _lines('verificador_latencia_segundos_sum{etapa="teste_histograma"}')
+    assert abs(float(total.rsplit(" ", 1)[1]) - 120.743) < 1e-9
+
+
+def test_counter_labels_are_escaped():
+    metrics.increment("teste_rotulos", origem='lista "a"\\b\nc')
+    assert _lines("verificador_teste_rotulos_total") == [
+        'verificador_teste_rotulos_total{origem="lista \\"a\\"\\\\b\\nc"} 1'
+    ]
+    assert "# TYPE verificador_teste_rotulos_total counter" in metrics.render_prometheus()
+
+
+def test_samples_are_only_logged_at_info(caplog):
+    with caplog.at_level(logging.WARNING, logger="metrics"):
+        metrics.record_latency("teste_registo", 0.1)
+    assert not caplog.records
+    with caplog.at_level(logging.INFO, logger="metrics"):
+        metrics.record_latency("teste_registo", 0.3)
+    (record,) = caplog.records
+    assert json.loads(record.getMessage()) == {"etapa": "teste_registo", "segundos": 0.3, "p50": 0.1, "p95": 0.3, "n": 2}
@@ -0,0 +1,12 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_pipeline_and_scheduler_do_not_load_media_dependencies():
+    # Importados no arranque da aplicação: PIL e pydub só devem carregar com a primeira imagem ou áudio
+    code = "import sys, pipeline, scheduler; print(sorted({'media', 'PIL', 'pydub'} & set(sys.modules)))"
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "[]"
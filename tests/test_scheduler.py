@@ -0,0 +1,192 @@
+import threading
+import time
+
+import pytest
+
+import scheduler
+from scheduler import SingleFlight, TokenBucket
+
+
+def _start(target, *args):
+    thread = threading.Thread(target=target, args=args)
+    thread.start()
+    return thread
+
+
+def test_followers_share_the_leader_result():
+    flights = SingleFlight()
+    release = threading.Event()
+    calls = []
+    results = []
+
+    def work():
+        calls.append(1)
+        release.wait(2)
+        return "veredicto"
+
+    threads = [_start(lambda: results.append(flights.do("k", work))) for _ in range(5)]
+    time.sleep(0.1)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert results == ["veredicto"] * 5
+
+
+def test_followers_receive_the_leader_error():
+    flights = SingleFlight()
+    release = threading.Event()
+    errors = []
+
+    def work():
+        release.wait(2)
+        raise ValueError("falhou")
+
+    def run():
+        try:
+            flights.do("k", work)
+        except ValueError as e:
+            errors.append(str(e))
+
+    threads = [_start(run) for _ in range(3)]
+    time.sleep(0.1)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert errors == ["falhou"] * 3
+
+
+def test_stream_followers_get_the_combined_result():
+    flights = SingleFlight()
+    release = threading.Event()
+
+    def chunks():
+        yield "parte 1 "
+        release.wait(2)
+        yield "parte 2"
+
+    leader = flights.stream("k", chunks, "".join)
+    assert next(leader) == "parte 1 "
+    followed = []
+    follower = _start(lambda: followed.extend(flights.stream("k", chunks, "".join)))
+    time.sleep(0.1)
+    release.set()
+    assert list(leader) == ["parte 2"]
+    follower.join(2)
+    assert followed == ["parte 1 parte 2"]
+
+
+def test_aborted_stream_leader_never_shares_a_partial_result():
+    flights = SingleFlight()
+    started = []
+
+    def chunks():
+        started.append(1)
+        yield "### Análise Detalhada\n"
+        yield "parte 1 "
+        yield "parte 2"
+
+    leader = flights.stream("k", chunks, "".join)
+    assert next(leader) == "### Análise Detalhada\n"
+    followed = []
+    follower = _start(lambda: followed.extend(flights.stream("k", chunks, "".join)))
+    time.sleep(0.1)
+    leader.close()  # a sessão líder deixou de ler (rerun)
+    follower.join(2)
+    # Quem esperava refaz a chamada e recebe a resposta completa, nunca o pedaço já entregue
+    assert len(started) == 2
+    assert "".join(followed) == "### Análise Detalhada\nparte 1 parte 2"
+
+
+def test_retry_after_transient_errors(monkeypatch):
+    monkeypatch.setattr(scheduler.time, "sleep", lambda seconds: None)
+
+    class QuotaError(Exception):
+        code = 429
+
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise QuotaError()
+        return "ok"
+
+    assert scheduler.Scheduler(attempts=4).call("teste", flaky) == "ok"
+    assert len(attempts) == 3
+    with pytest.raises(ValueError):
+        scheduler.Scheduler(attempts=4).call("teste", lambda: (_ for _ in ()).throw(ValueError()))
+
+
+def test_interactive_requests_take_tokens_before_batch(tmp_path):
+    path = str(tmp_path / "cota.sqlite3")
+    # Dois baldes sobre o mesmo ficheiro, como a aplicação e o batch.py em processos diferentes
+    app, batch_process = TokenBucket(rate=20, capacity=1, path=path), TokenBucket(rate=20, capacity=1, path=path)
+    app.acquire()  # esvazia o balde
+    order = []
+
+    def take(level, name):
+        (batch_process if level == scheduler.BATCH else app).acquire(level)
+        order.append(name)
+
+    batch = [_start(take, scheduler.BATCH, f"lote{i}") for i in range(3)]
+    time.sleep(0.01)
+    interactive = [_start(take, scheduler.INTERACTIVE, f"interativo{i}") for i in range(2)]
+    for thread in batch + interactive:
+        thread.join()
+    # Nenhuma ficha chega antes dos interativos (1 a cada 50 ms): estes passam à frente do lote
+    assert [name.rstrip("0123456789") for name in order] == ["interativo"] * 2 + ["lote"] * 3, order
+
+
+def test_audio_uploads_go_through_the_scheduler(monkeypatch):
+    import agents
+    from pipeline import prepare_prompt_parts
+
+    monkeypatch.setattr(scheduler.time, "sleep", lambda seconds: None)
+    monkeypatch.setattr(scheduler, "_scheduler", scheduler.Scheduler(attempts=3))
+
+    class QuotaError(Exception):
+        code = 429
+
+    class FlakyUploads:
+        attempts = 0
+
+        def upload_file(self, data, mime_type):
+            self.attempts += 1
+            if self.attempts == 1:
+                raise QuotaError()
+            return f"[{mime_type}]"
+
+    backend = FlakyUploads()
+    monkeypatch.setattr(agents, "_registry", backend)
+    parts = prepare_prompt_parts("texto", audio_bytes=b"OggS" + bytes(64), upload=agents.upload_media)
+    assert parts == ["texto", "[audio/ogg]"]
+    assert backend.attempts == 2
+
+
+def test_the_quota_is_shared_between_processes(tmp_path):
+    import os
+    import subprocess
+    import sys
+
+    path = str(tmp_path / "cota.sqlite3")
+    script = "\n".join([
+        "import sys, time",
+        "sys.path.insert(0, sys.argv[3])",
+        "from scheduler import TokenBucket",
+        "bucket = TokenBucket(rate=20, capacity=1, path=sys.argv[1])",
+        "time.sleep(max(0, float(sys.argv[2]) - time.time()))",
+        "for _ in range(5):",
+        "    bucket.acquire()",
+        "    print(time.time())",
+    ])
+    root = os.path.dirname(os.path.abspath(scheduler.__file__))
+    start_at = str(time.time() + 3)  # os dois processos começam a pedir fichas ao mesmo tempo
+    workers = [subprocess.Popen([sys.executable, "-c", script, path, start_at, root], stdout=subprocess.PIPE, text=True)
+               for _ in range(2)]
+    taken = sorted(float(t) for worker in workers for t in worker.communicate(timeout=30)[0].split())
+    assert len(taken) == 10
+    # Nunca mais fichas do que a rajada (1) mais 20 por segundo, somando os dois processos
+    for i in range(len(taken)):
+        for j in range(i + 1, len(taken)):
+            assert j - i <= 1 + 20 * (taken[j] - taken[i]) + 0.5, taken
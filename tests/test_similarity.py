@@ -0,0 +1,99 @@
+import time
+
+import pytest
+
+from similarity_index import SimilarityIndex
+from verdict_cache import VerdictCache
+from verifier import Verifier
+
+CAMPAIGN = "Olá {}, sua encomenda está retida na alfândega. Pague a taxa de liberação de R$ 49,90 em bit.ly/abc até hoje."
+ANALYSIS = {"analise": "Falsa cobrança de taxa.", "risco": "Alto", "fontes": []}
+
+
+def _stores(tmp_path, **cache_options):
+    cache = VerdictCache(str(tmp_path / "veredictos.sqlite3"), **cache_options)
+    index = SimilarityIndex(str(tmp_path / "similares.sqlite3"))
+    return cache, index
+
+
+def test_query_ranks_every_match(tmp_path):
+    _, index = _stores(tmp_path)
+    index.add(CAMPAIGN.format("Maria"), "maria")
+    index.add(CAMPAIGN.format("Maria") + " Responda SIM para confirmar o endereço.", "maria_sim")
+    index.add("Reunião de condomínio remarcada para quinta às 19h no salão de festas do prédio.", "reuniao")
+    matches = index.query(CAMPAIGN.format("Mariana"), threshold=0.5)
+    assert [key for key, _ in matches] == ["maria", "maria_sim"]
+    assert matches[0][1] >= matches[1][1]
+
+
+def test_evicted_verdicts_leave_the_index(tmp_path):
+    cache, index = _stores(tmp_path, max_entries=1)
+    Verifier(cache, index)  # liga o despejo do cache ao índice
+    index.add(CAMPAIGN.format("Maria"), "maria")
+    cache.set("maria", ANALYSIS, "resposta")
+    cache.set("outro", ANALYSIS, "resposta")
+    assert cache.get("maria") is None
+    assert index.query(CAMPAIGN.format("Maria")) == []
+
+
+def test_expired_verdicts_leave_the_index(tmp_path):
+    cache, index = _stores(tmp_path, ttl=0.01)
+    Verifier(cache, index)
+    index.add(CAMPAIGN.format("Maria"), "maria")
+    cache.set("maria", ANALYSIS, "resposta")
+    time.sleep(0.02)
+    assert cache.get("maria") is None
+    assert index.query(CAMPAIGN.format("Maria")) == []
+
+
+def test_verifier_uses_the_best_candidate_still_cached(tmp_path):
+    cache, index = _stores(tmp_path)
+    verifier = Verifier(cache, index)
+    index.add(CAMPAIGN.format("Mariana"), "despejado")  # sem veredicto: apagado noutro processo
+    index.add(CAMPAIGN.format("Maria") + " Responda SIM.", "em_cache")
+    cache.set("em_cache", ANALYSIS, "resposta guardada")
+    result = verifier.analyze(CAMPAIGN.format("Mariana"))
+    assert (result.source, result.response) == ("semelhante", "resposta guardada")
+
+
+def _half_shared_pairs(count=60):
+    import random
+    from similarity_index import estimate_similarity, minhash, shingles
+    rng = random.Random(1)
+    words = ("pague taxa liberacao encomenda retida correios acesse link urgente hoje cliente prezado conta "
+             "bloqueio pix valor regularize cadastro dados banco cartao premio sorteio").split()
+    pairs = []
+    for _ in range(count):
+        a = [rng.choice(words) for _ in range(20)]
+        b = a[:10] + [rng.choice(words) for _ in range(10)]
+        a, b = " ".join(a), " ".join(b)
+        if estimate_similarity(minhash(shingles(a)), minhash(shingles(b))) >= 0.5:
+            pairs.append((a, b))
+    return pairs
+
+
+def test_bands_follow_the_threshold():
+    from similarity_index import lsh_params
+    assert lsh_params(0.5)[0] < lsh_params(0.75)[0] < lsh_params(0.9)[0]
+    with pytest.raises(ValueError):
+        lsh_params(0)
+
+
+def test_a_lower_threshold_finds_less_similar_messages(tmp_path):
+    pairs = _half_shared_pairs()
+    index = SimilarityIndex(str(tmp_path / "similares.sqlite3"), threshold=0.5)
+    for i, (a, _) in enumerate(pairs):
+        index.add(a, f"k{i}")
+    found = sum(1 for i, (_, b) in enumerate(pairs) if f"k{i}" in dict(index.query(b)))
+    assert found >= 0.9 * len(pairs)
+
+
+def test_changing_the_threshold_rebuilds_the_buckets(tmp_path):
+    path = str(tmp_path / "similares.sqlite3")
+    pairs = _half_shared_pairs()
+    index = SimilarityIndex(path, threshold=0.9)
+    for i, (a, _) in enumerate(pairs):
+        index.add(a, f"k{i}")
+    index = SimilarityIndex(path, threshold=0.5)
+    found = sum(1 for i, (_, b) in enumerate(pairs) if f"k{i}" in dict(index.query(b)))
+    assert found >= 0.9 * len(pairs)
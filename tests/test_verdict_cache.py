@@ -0,0 +1,63 @@
+import time
+
+import pytest
+
+from storage import open_db, transaction
+from verdict_cache import VerdictCache, content_key
+
+ANALYSIS = {"analise": "Falsa central de atendimento.", "risco": "Alto", "fontes": []}
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return VerdictCache(str(tmp_path / "veredictos.sqlite3"))
+
+
+def test_content_key_ignores_spacing_and_case_but_not_media():
+    assert content_key("Sua  conta\nserá BLOQUEADA") == content_key("sua conta será bloqueada")
+    assert content_key("texto", b"imagem") != content_key("texto", None, b"imagem")
+
+
+def test_hits_and_misses_are_counted(cache):
+    assert cache.get("k") is None
+    cache.set("k", ANALYSIS, "resposta")
+    assert cache.get("k") == (ANALYSIS, "resposta")
+    assert cache.stats() == {"hits": 1, "misses": 1, "entries": 1, "hit_rate": 0.5}
+
+
+def test_entries_expire_after_the_ttl(tmp_path):
+    cache = VerdictCache(str(tmp_path / "veredictos.sqlite3"), ttl=0.05)
+    cache.set("k", ANALYSIS, "resposta")
+    assert cache.get("k") is not None
+    time.sleep(0.06)
+    assert cache.get("k") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_the_least_recently_used_entry_is_evicted(tmp_path):
+    cache = VerdictCache(str(tmp_path / "veredictos.sqlite3"), max_entries=2)
+    cache.set("a", ANALYSIS, "resposta a")
+    time.sleep(0.01)
+    cache.set("b", ANALYSIS, "resposta b")
+    time.sleep(0.01)
+    cache.get("a")  # "a" passa a ser a mais recente
+    cache.set("c", ANALYSIS, "resposta c")
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+
+
+def test_the_cache_file_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / "veredictos.sqlite3")
+    VerdictCache(path).set("k", ANALYSIS, "resposta")
+    assert VerdictCache(path).get("k") == (ANALYSIS, "resposta")
+
+
+def test_transactions_roll_back_on_error(tmp_path):
+    conn = open_db(str(tmp_path / "sub" / "teste.sqlite3"))
+    conn.execute("CREATE TABLE t (x INTEGER)")
+    with pytest.raises(ValueError):
+        with transaction(conn):
+            conn.execute("INSERT INTO t VALUES (1)")
+            raise ValueError()
+    assert conn.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 0
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
@@ -0,0 +1,32 @@
+import pytest
+
+import verifier
+from heuristics import RuleEngine
+from report import parse_sections, recommendation_items
+from verifier import Verifier
+
+
+@pytest.fixture
+def no_model(monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("veredictos locais não chamam a IA")
+    for name in ("call_analyzer_agent", "call_combined_agent", "call_validator_agent"):
+        monkeypatch.setattr(verifier, name, fail)
+
+
+def test_rule_verdicts_build_the_final_answer_locally(no_model):
+    result = Verifier(rules=RuleEngine()).verify("Sua conta será bloqueada. Acesse bit.ly/3xYz9")
+    assert (result.source, result.analysis["risco"]) == ("regras", "Alto")
+    sections = parse_sections(result.response)
+    assert "- Link encurtado" in sections["Análise Detalhada"]
+    assert len(recommendation_items(sections["Recomendações de Segurança"])) == len(verifier.LOCAL_RECOMMENDATIONS)
+
+
+def test_blocklisted_indicators_build_the_final_answer_locally(no_model, tmp_path):
+    from ioc_index import IndicatorIndex
+    rules = RuleEngine()
+    indicators = IndicatorIndex(str(tmp_path / "indicadores.sqlite3"), rules=rules, bloom=False)
+    indicators.import_rows([("dominio", "entregas-correios.xyz")], "Alto", "lista:teste")
+    result = Verifier(rules=rules, indicators=indicators).verify("Pague em https://entregas-correios.xyz/pagar")
+    assert (result.source, result.analysis["risco"]) == ("indicadores", "Alto")
+    assert "dominio `entregas-correios.xyz` consta de uma lista de bloqueio" in result.response
@@ -0,0 +1,13 @@
+"""Funções partilhadas pelas páginas da interface (configuração e PDFs em cache)."""
+import streamlit as st
+
+
+def get_setting(name, default):
+    # Ajustes opcionais na secção [verificador] do secrets.toml
+    return st.secrets.get("verificador", {}).get(name, default)
+
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def get_pdf(title, content):
+    from report import generate_pdf  # o fpdf só é importado quando alguém descarrega um relatório
+    return generate_pdf(title, content)
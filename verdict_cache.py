@@ -0,0 +1,109 @@
+"""Cache persistente de veredictos (análise + resposta final), endereçado por conteúdo."""
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import unicodedata
+
+from metrics import increment
+from storage import open_db, transaction
+
+DEFAULT_PATH = os.path.join(".cache", "veredictos.sqlite3")
+DEFAULT_TTL = 7 * 24 * 3600  # segundos
+DEFAULT_MAX_ENTRIES = 50_000
+
+
+def normalize_text(text):
+    # Mensagens repetidas chegam com espaços, quebras de linha e maiúsculas diferentes
+    text = unicodedata.normalize("NFKC", text or "").casefold()
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def content_key(text=None, image_bytes=None, audio_bytes=None):
+    digest = hashlib.sha256()
+    for tag, part in ((b"t", normalize_text(text).encode("utf-8")), (b"i", image_bytes or b""), (b"a", audio_bytes or b"")):
+        # Prefixo de tamanho evita colisões entre partes concatenadas
+        digest.update(tag + len(part).to_bytes(8, "big"))
+        digest.update(part)
+    return digest.hexdigest()
+
+
+class VerdictCache:
+    """Guarda tuplas (analysis_data, full_response) em SQLite, com TTL e despejo LRU.
+
+    O ficheiro é partilhado entre sessões e processos; os contadores de acertos/falhas são por processo.
+    As funções registadas com `add_eviction_listener` recebem as chaves apagadas por TTL ou despejo.
+    """
+
+    def __init__(self, path=DEFAULT_PATH, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._listeners = []
+        self._conn = open_db(path)
+        self._conn.execute("""CREATE TABLE IF NOT EXISTS verdicts (
+            key TEXT PRIMARY KEY, analysis TEXT NOT NULL, response TEXT NOT NULL,
+            created REAL NOT NULL, last_access REAL NOT NULL) WITHOUT ROWID""")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_verdicts_last_access ON verdicts(last_access)")
+
+    def add_eviction_listener(self, listener):
+        # Ex.: `SimilarityIndex.remove`, para o índice não apontar para veredictos que já não existem
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    def _notify(self, keys):
+        # Fora do lock: os ouvintes escrevem nos seus próprios ficheiros
+        if keys:
+            for listener in self._listeners:
+                listener(keys)
+
+    def get(self, key):
+        now = time.time()
+        expired = []
+        with self._lock:
+            row = self._conn.execute("SELECT analysis, response, created FROM verdicts WHERE key = ?", (key,)).fetchone()
+            if row is None or now - row[2] > self.ttl:
+                if row is not None:
+                    self._conn.execute("DELETE FROM verdicts WHERE key = ?", (key,))
+                    expired.append(key)
+                self.misses += 1
+                row = None
+            else:
+                self._conn.execute("UPDATE verdicts SET last_access = ? WHERE key = ?", (now, key))
+                self.hits += 1
+        if row is None:
+            increment("cache_veredictos", resultado="falha")
+            self._notify(expired)
+            return None
+        increment("cache_veredictos", resultado="acerto")
+        return json.loads(row[0]), row[1]
+
+    def set(self, key, analysis_data, full_response):
+        now = time.time()
+        with self._lock, transaction(self._conn):
+            self._conn.execute(
+                "INSERT OR REPLACE INTO verdicts (key, analysis, response, created, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, json.dumps(analysis_data, ensure_ascii=False), full_response, now, now),
+            )
+            evicted = self._evict(now)
+        self._notify(evicted)
+
+    def _evict(self, now):
+        evicted = [row[0] for row in self._conn.execute("SELECT key FROM verdicts WHERE created < ?", (now - self.ttl,))]
+        excess = self._conn.execute("SELECT COUNT(*) FROM verdicts").fetchone()[0] - len(evicted) - self.max_entries
+        if excess > 0:
+            evicted += [row[0] for row in self._conn.execute(
+                "SELECT key FROM verdicts WHERE created >= ? ORDER BY last_access LIMIT ?", (now - self.ttl, excess),
+            )]
+        self._conn.executemany("DELETE FROM verdicts WHERE key = ?", [(key,) for key in evicted])
+        return evicted
+
+    def stats(self):
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM verdicts").fetchone()[0]
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "entries": entries, "hit_rate": self.hits / total if total else 0.0}
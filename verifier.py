@@ -0,0 +1,158 @@
+"""Fluxo de verificação independente da interface: cache, semelhantes, regras locais e agentes de IA."""
+import time
+from collections import namedtuple
+
+from agents import (
+    VALIDATOR_BLOCKED, VALIDATOR_ERROR, call_analyzer_agent, call_combined_agent, call_validator_agent, upload_media,
+)
+from ioc_index import is_flagged
+from metrics import increment, record_latency
+from pipeline import DEFAULT_MAX_EDGE, DEFAULT_QUALITY, prepare_prompt_parts, run_in_background
+from scheduler import SingleFlight
+from verdict_cache import content_key
+
+MODES = ("sequencial", "streaming", "combinado")
+
+# source: "cache", "semelhante", "indicadores", "regras" ou "modelo"; response fica None até o Validador responder
+# (os veredictos locais, "indicadores" e "regras", já trazem a resposta final)
+# indicators: indicadores da mensagem sinalizados pelo índice (ioc_index.is_flagged), do mais grave ao menos grave
+Verification = namedtuple(
+    "Verification", ["key", "analysis", "response", "source", "similarity", "text_only", "started", "indicators"],
+    defaults=((),),
+)
+
+
+def indicator_analysis(indicators):
+    # Veredicto local quando a mensagem traz indicadores de listas de bloqueio com risco alto
+    found = "; ".join(f"{i.kind} {i.value} ({i.origin})" for i in indicators)
+    return {
+        "analise": f"A mensagem contém indicadores presentes em listas de bloqueio de golpes: {found}.",
+        "risco": "Alto",
+        "fontes": [],
+    }
+
+
+LOCAL_RECOMMENDATIONS = (
+    "Não clique nos links nem abra anexos desta mensagem.",
+    "Não faça pagamentos ou transferências Pix e não informe senhas, códigos de verificação ou dados pessoais.",
+    "Se tiver dúvidas, contate a empresa ou a pessoa pelos canais oficiais que você já conhece, nunca pelos contatos da mensagem.",
+    "Bloqueie o remetente e denuncie a mensagem.",
+)
+
+
+def local_response(signals):
+    # Resposta final dos veredictos locais (regras e listas de bloqueio), no formato do Validador, sem chamar a IA
+    found = "\n".join(f"- {signal}" for signal in signals)
+    recommendations = "\n".join(f"{n}. {item}" for n, item in enumerate(LOCAL_RECOMMENDATIONS, 1))
+    return (f"### Análise Detalhada\nEsta mensagem tem sinais claros de golpe:\n{found}\n\n"
+            f"### Recomendações de Segurança\n{recommendations}\n")
+
+
+class Verifier:
+    """Orquestra a verificação de um conteúdo; cache, índices e regras são opcionais (None desativa)."""
+
+    def __init__(self, cache=None, index=None, rules=None, mode="sequencial",
+                 max_edge=DEFAULT_MAX_EDGE, quality=DEFAULT_QUALITY, indicators=None):
+        if mode not in MODES:
+            raise ValueError(f"Modo de análise desconhecido: {mode}")
+        self.cache = cache
+        self.index = index
+        self.rules = rules
+        self.indicators = indicators
+        self.mode = mode
+        self.max_edge = max_edge
+        self.quality = quality
+        self._flights = SingleFlight()
+        if cache is not None and index is not None:
+            cache.add_eviction_listener(index.remove)
+
+    def analyze(self, text=None, image_bytes=None, audio_bytes=None):
+        started = time.perf_counter()
+        key = content_key(text, image_bytes, audio_bytes)
+        # Sessões que enviam o mesmo conteúdo ao mesmo tempo partilham uma única análise (e um único upload)
+        verification = self._flights.do(key, self._analyze, key, text, image_bytes, audio_bytes, started)
+        return verification._replace(started=started)
+
+    def _analyze(self, key, text, image_bytes, audio_bytes, started):
+        text_only = not (image_bytes or audio_bytes)
+        scan = self.rules.scan(text) if self.rules and text else None
+        # Indicadores de listas de bloqueio ou já vistos em golpes de risco alto são sinalizados antes do modelo
+        known = self.indicators.lookup(self.indicators.extract(text, scan)) if self.indicators and text else []
+        known = [i for i in known if is_flagged(i)]
+        # Conteúdo idêntico já analisado: devolve o veredicto guardado sem chamar a IA
+        cached = self.cache.get(key) if self.cache else None
+        if cached:
+            return Verification(key, cached[0], cached[1], "cache", None, text_only, started, known)
+
+        similar = match = None
+        if self.index and self.cache and text:
+            # Mesma campanha com outro nome, valor ou link: reaproveita o veredicto da mais parecida ainda em cache
+            stale = []
+            for candidate in self.index.query(text):
+                similar = self.cache.get(candidate[0])
+                if similar:
+                    match = candidate
+                    break
+                stale.append(candidate[0])
+            if stale:
+                # Veredictos despejados por outro processo: o índice deixa de apontar para eles
+                run_in_background(self.index.remove, stale)
+            if similar and text_only:
+                return Verification(key, similar[0], similar[1], "semelhante", match[1], text_only, started, known)
+
+        # Só listas de bloqueio dispensam o modelo: mensagens de golpe citam também o domínio legítimo imitado
+        high = [i for i in known if i.risk == "Alto" and i.origin.startswith("lista")]
+        if high:
+            signals = [f"{i.kind} `{i.value}` consta de uma lista de bloqueio de golpes" for i in high]
+            response = local_response(signals + (scan.signals if scan else []))
+            return Verification(key, indicator_analysis(high), response, "indicadores", None, text_only, started, known)
+
+        # Golpes óbvios são resolvidos pelas regras locais, sem upload nem chamada ao Analisador ou ao Validador
+        analysis = self.rules.classify(text, scan) if scan else None
+        if analysis is not None:
+            return Verification(key, analysis, local_response(scan.signals), "regras", None, text_only, started, known)
+
+        context = []
+        if similar:
+            context.append(f"Contexto: um texto muito semelhante (similaridade {match[1]:.0%}) já foi classificado com risco {similar[0].get('risco', 'Indeterminado')}.")
+        if known:
+            context.append("Contexto: indicadores desta mensagem já associados a golpes: "
+                           + "; ".join(f"{i.kind} {i.value} (risco {i.risk})" for i in known) + ".")
+        context = " ".join(context) or None
+        # Imagem e áudio são preparados em paralelo (compactação e upload)
+        prompt_parts = prepare_prompt_parts(
+            text, image_bytes, audio_bytes, context, self.max_edge, self.quality, upload=upload_media,
+        )
+        if self.mode == "combinado":
+            analysis = call_combined_agent(prompt_parts)
+            return Verification(key, analysis, analysis.pop("resposta", None), "modelo", None, text_only, started, known)
+        return Verification(key, call_analyzer_agent(prompt_parts), None, "modelo", None, text_only, started, known)
+
+    def finish(self, verification, response, text=None):
+        """Regista a latência e guarda o veredicto (em segundo plano) quando a resposta final é válida."""
+        verification = verification._replace(response=response)
+        label = verification.source if verification.source in ("cache", "semelhante") else self.mode
+        record_latency(f"verificacao_{label}", time.perf_counter() - verification.started)
+        increment("verificacoes", origem=verification.source)
+        if response in (VALIDATOR_BLOCKED, VALIDATOR_ERROR):
+            return verification
+        if self.indicators and text:
+            # Também nas respostas do cache, para atualizar a última ocorrência de cada indicador
+            analysis = verification.analysis
+            run_in_background(self.indicators.record, text, analysis.get("risco"), analysis.get("fontes"))
+        if verification.source in ("cache", "semelhante"):
+            return verification
+        if self.cache:
+            run_in_background(self.cache.set, verification.key, verification.analysis, response)
+        if self.index and text and verification.text_only:
+            run_in_background(self.index.add, text, verification.key)
+        return verification
+
+    def verify(self, text=None, image_bytes=None, audio_bytes=None):
+        verification = self.analyze(text, image_bytes, audio_bytes)
+        if not verification.analysis or "error" in verification.analysis:
+            return verification
+        response = verification.response
+        if response is None:
+            response = call_validator_agent(verification.analysis)
+        return self.finish(verification, response, text)
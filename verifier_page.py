@@ -0,0 +1,168 @@
+"""Página do verificador: envio do conteúdo suspeito e apresentação do veredicto."""
+import functools
+import time
+
+import streamlit as st
+from streamlit_mic_recorder import mic_recorder
+
+from verdict_cache import VerdictCache
+from similarity_index import SimilarityIndex, DEFAULT_THRESHOLD
+from heuristics import RuleEngine
+from ioc_index import IndicatorIndex
+from metrics import record_latency, span
+from pipeline import DEFAULT_MAX_EDGE, DEFAULT_QUALITY
+from agents import VALIDATOR_BLOCKED, VALIDATOR_ERROR, call_validator_agent, stream_validator_agent
+from verifier import Verifier
+from report import parse_sections, recommendation_items
+from ui import get_pdf, get_setting
+
+# --- FUNÇÕES DO AGENTE DE IA (VERIFICADOR) ---
+@st.cache_resource
+def get_verdict_cache():
+    # Uma instância por processo; o ficheiro SQLite é partilhado entre sessões e réplicas
+    return VerdictCache()
+
+@st.cache_resource
+def get_similarity_index():
+    return SimilarityIndex(threshold=get_setting("limiar_similaridade", DEFAULT_THRESHOLD))
+
+@st.cache_resource
+def get_rule_engine():
+    return RuleEngine()
+
+@st.cache_resource
+def get_indicator_index():
+    return IndicatorIndex(rules=get_rule_engine())
+
+@st.cache_resource
+def get_verifier():
+    return Verifier(
+        get_verdict_cache(), get_similarity_index(), get_rule_engine(),
+        mode=get_setting("modo_analise", "sequencial"),
+        max_edge=get_setting("imagem_lado_maximo", DEFAULT_MAX_EDGE),
+        quality=get_setting("imagem_qualidade", DEFAULT_QUALITY),
+        indicators=get_indicator_index(),
+    )
+
+# --- FUNÇÕES DE UI ---
+def get_risk_color(risk): return {"alto": "#FF4B4B", "médio": "#FFC700", "baixo": "#28A745"}.get(risk.lower(), "#6c757d")
+
+def show_risk_level(risk):
+    st.markdown(f"**Nível de Risco:** <span style='color:{get_risk_color(risk)}; font-weight: bold;'>{risk.upper()}</span>", unsafe_allow_html=True)
+
+def display_streaming_analysis(data, chunks, started):
+    # Mostra a "Análise Detalhada" à medida que chega; o painel é substituído pelo resultado completo no fim
+    panel = st.empty()
+    with panel.container():
+        show_risk_level(data.get("risco", "Indeterminado"))
+        st.subheader("🔍 Análise Detalhada")
+        body = st.empty()
+    response = ""
+    for i, chunk in enumerate(chunks):
+        if chunk in (VALIDATOR_BLOCKED, VALIDATOR_ERROR):
+            response = chunk
+            break
+        if i == 0:
+            record_latency("primeira_saida_streaming", time.perf_counter() - started)
+        response += chunk
+        body.markdown(parse_sections(response).get("Análise Detalhada", ""))
+    panel.empty()
+    return response
+
+def display_analysis_results(data, response):
+    with span("renderizacao"):
+        risk = data.get("risco", "Indeterminado")
+        show_risk_level(risk)
+        sections = parse_sections(response)
+
+        if "Análise Detalhada" in sections:
+            st.subheader("🔍 Análise Detalhada")
+            st.markdown(sections["Análise Detalhada"])
+        if "Recomendações de Segurança" in sections:
+            st.subheader("🛡️ Recomendações de Segurança")
+            for rec_text in recommendation_items(sections["Recomendações de Segurança"]):
+                st.markdown(f"<div class='recommendation-card'>{rec_text}</div>", unsafe_allow_html=True)
+        if "Fontes Consultadas" in sections:
+            st.subheader("🔗 Fontes Consultadas")
+            st.markdown(sections["Fontes Consultadas"])
+
+        # O PDF só é gerado quando o utilizador clica, e fica em cache pelo conteúdo da resposta
+        pdf_bytes = functools.partial(get_pdf, f"Relatorio de Analise - Risco {risk.upper()}", response)
+        st.download_button("Salvar Relatório em PDF", pdf_bytes, "relatorio_analise.pdf", "application/pdf", on_click="ignore")
+
+@st.fragment
+def show_results_panel():
+    # Clicar no download não reexecuta a página inteira
+    if st.session_state.analysis_results:
+        display_analysis_results(*st.session_state.analysis_results)
+
+@st.fragment
+def show_audio_recorder():
+    # Gravar ou apagar um áudio só reexecuta este bloco
+    st.markdown("<h6>Ou grave um áudio:</h6>", unsafe_allow_html=True)
+    audio_info = mic_recorder("Gravar", "Parar", key='recorder')
+
+    if audio_info and audio_info['bytes']:
+        st.session_state.recorded_audio = audio_info['bytes']
+
+    if st.session_state.recorded_audio:
+        st.write("Áudio gravado:")
+        st.audio(st.session_state.recorded_audio)
+        if st.button("Apagar Gravação"):
+            st.session_state.recorded_audio = None
+            st.rerun(scope="fragment")
+
+# --- RENDERIZAÇÃO DA PÁGINA ---
+
+def show_verifier_page():
+    st.markdown("<h3>Verificador de Conteúdo Suspeito</h3>", unsafe_allow_html=True)
+    input_col, options_col = st.columns([60, 40])
+    with input_col:
+        text_input = st.text_area("Conteúdo textual:", height=300)
+        verify_button = st.button("Verificar Agora", use_container_width=True)
+    with options_col:
+        st.markdown("<h6>Envie uma imagem:</h6>", unsafe_allow_html=True)
+        uploaded_image = st.file_uploader("Arraste e solte ou procure o ficheiro", type=["jpg", "png"], label_visibility="collapsed")
+        
+        st.markdown("<h6>Envie um áudio:</h6>", unsafe_allow_html=True)
+        uploaded_audio = st.file_uploader("Arraste e solte ou procure o ficheiro", type=["wav", "mp3", "m4a"], label_visibility="collapsed")
+        
+        show_audio_recorder()
+
+    if verify_button:
+        st.session_state.analysis_results = None
+        image_bytes = uploaded_image.getvalue() if uploaded_image else None
+
+        audio_to_process = None
+        if uploaded_audio:
+            audio_to_process = uploaded_audio.getvalue()
+        elif st.session_state.recorded_audio:
+            audio_to_process = st.session_state.recorded_audio
+
+        if not (text_input or image_bytes or audio_to_process):
+            st.warning("Insira conteúdo para análise.")
+        else:
+            verifier = get_verifier()
+            with st.spinner("Analisando..."):
+                verification = verifier.analyze(text_input, image_bytes, audio_to_process)
+            if verification.indicators:
+                st.warning("Indicadores já conhecidos nesta mensagem: " + "; ".join(
+                    f"{i.kind} `{i.value}` (risco {i.risk})" for i in verification.indicators))
+            if verification.source == "semelhante":
+                st.info(f"Mensagem semelhante a uma campanha já analisada (similaridade {verification.similarity:.0%}).")
+            if verification.analysis and "error" not in verification.analysis:
+                full_response = verification.response
+                if full_response is None and verifier.mode == "streaming":
+                    full_response = display_streaming_analysis(verification.analysis, stream_validator_agent(verification.analysis), verification.started)
+                elif full_response is None:
+                    with st.spinner("Analisando..."):
+                        full_response = call_validator_agent(verification.analysis)
+                if verifier.mode != "streaming" and verification.source in ("modelo", "indicadores", "regras"):
+                    record_latency(f"primeira_saida_{verifier.mode}", time.perf_counter() - verification.started)
+                verifier.finish(verification, full_response, text_input)
+                st.session_state.analysis_results = (verification.analysis, full_response)
+            else:
+                st.error("Não foi possível obter uma análise.")
+    
+    show_results_panel()
+